@@ -1,15 +1,19 @@
 from datetime import datetime
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from app.api.v1.endpoints.auth import get_current_user, require_role
+from app.api.v1.pagination import paginate
 from app.db import models
 from app.db.session import get_db
 from app.schemas.alert import AlertAcknowledge, AlertOut
 from app.services.audit import log_audit
 from app.services.events import connection_manager
+from app.services.ingest import alert_message
+from app.services.principals import Principal
 
 
 router = APIRouter()
@@ -17,11 +21,14 @@ router = APIRouter()
 
 @router.get("/", response_model=List[AlertOut])
 def list_alerts(
+    response: Response,
     patient_id: Optional[str] = None,
     severity: Optional[str] = None,
     acknowledged: Optional[bool] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
-    user: models.User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ) -> List[models.Alert]:
     query = db.query(models.Alert)
     if patient_id:
@@ -30,18 +37,12 @@ def list_alerts(
         query = query.filter(models.Alert.severity == severity)
     if acknowledged is not None:
         query = query.filter(models.Alert.acknowledged.is_(acknowledged))
-    alerts = query.order_by(models.Alert.timestamp.desc()).all()
+    alerts = paginate(query, models.Alert.timestamp, models.Alert.id, response, cursor=cursor, limit=limit)
     log_audit(db, actor=user.username, role=user.role, action="alerts.list", patient_id=patient_id)
     return alerts
 
 
-@router.post("/{alert_id}/acknowledge", response_model=AlertOut)
-async def acknowledge_alert(
-    alert_id: str,
-    payload: AlertAcknowledge,
-    db: Session = Depends(get_db),
-    user: models.User = Depends(require_role("clinician")),
-) -> models.Alert:
+def _acknowledge(db: Session, alert_id: str, payload: AlertAcknowledge, user: Principal) -> AlertOut:
     alert = db.query(models.Alert).filter(models.Alert.id == alert_id).first()
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
@@ -50,18 +51,18 @@ async def acknowledge_alert(
     alert.acknowledged_at = datetime.utcnow()
     db.commit()
     db.refresh(alert)
+    acknowledged = AlertOut.from_orm(alert)
     log_audit(db, actor=user.username, role=user.role, action="alerts.acknowledge", patient_id=alert.patient_id)
-    await connection_manager.broadcast(
-        {
-            "type": "alert",
-            "payload": {
-                "id": alert.id,
-                "patient_id": alert.patient_id,
-                "severity": alert.severity,
-                "metric": alert.metric,
-                "timestamp": alert.timestamp.isoformat(),
-                "acknowledged": alert.acknowledged,
-            },
-        }
-    )
+    return acknowledged
+
+
+@router.post("/{alert_id}/acknowledge", response_model=AlertOut)
+async def acknowledge_alert(
+    alert_id: str,
+    payload: AlertAcknowledge,
+    db: Session = Depends(get_db),
+    user: Principal = Depends(require_role("clinician")),
+) -> AlertOut:
+    alert = await run_in_threadpool(_acknowledge, db, alert_id, payload, user)
+    await connection_manager.broadcast(alert_message(alert))
     return alert
@@ -1,12 +1,21 @@
-from fastapi import APIRouter, Depends
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy.orm import Session
 
-from app.api.v1.endpoints.auth import get_current_user
+from app.api.v1.endpoints.auth import get_current_user, require_role
+from app.api.v1.pagination import paginate
 from app.db import models
 from app.db.session import get_db
 from app.schemas.analytics import PatientAnalytics
-from app.services.analytics import compute_patient_analytics
-from app.services.audit import log_audit
+from app.services.analytics import (
+    analytics_cache,
+    cached_patient_analytics,
+    cohort_query,
+    compute_cohort_analytics,
+)
+from app.services.audit import log_audit, log_audit_batch
+from app.services.principals import Principal
 
 
 router = APIRouter()
@@ -16,8 +25,40 @@ router = APIRouter()
 def get_patient_analytics(
     patient_id: str,
     db: Session = Depends(get_db),
-    user: models.User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ) -> dict:
-    payload = compute_patient_analytics(db, patient_id)
+    payload = cached_patient_analytics(db, patient_id)
     log_audit(db, actor=user.username, role=user.role, action="analytics.summary", patient_id=patient_id)
     return payload
+
+
+@router.get("/cohort", response_model=List[PatientAnalytics])
+def get_cohort_analytics(
+    response: Response,
+    clinician: Optional[str] = None,
+    risk_profile: Optional[str] = None,
+    monitoring_status: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    user: Principal = Depends(get_current_user),
+) -> List[dict]:
+    query = cohort_query(db, clinician=clinician, risk_profile=risk_profile, monitoring_status=monitoring_status)
+    page = paginate(query, None, models.Patient.id, response, cursor=cursor, limit=limit)
+    if not page:
+        return []
+    payload = compute_cohort_analytics(db, query.filter(models.Patient.id.between(page[0].id, page[-1].id)))
+    log_audit_batch(
+        db,
+        actor=user.username,
+        role=user.role,
+        action="analytics.cohort",
+        patient_ids=[item["patient_id"] for item in payload],
+        details={"clinician": clinician, "risk_profile": risk_profile, "monitoring_status": monitoring_status},
+    )
+    return payload
+
+
+@router.get("/cache")
+def get_analytics_cache_stats(user: Principal = Depends(require_role("admin"))) -> dict:
+    return analytics_cache.stats()
@@ -1,12 +1,14 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy.orm import Session
 
 from app.api.v1.endpoints.auth import require_role
+from app.api.v1.pagination import paginate
 from app.db import models
 from app.db.session import get_db
 from app.schemas.audit import AuditOut
+from app.services.principals import Principal
 
 
 router = APIRouter()
@@ -14,12 +16,14 @@ router = APIRouter()
 
 @router.get("/", response_model=List[AuditOut])
 def list_audit_logs(
+    response: Response,
     patient_id: Optional[str] = None,
-    limit: int = 200,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
-    user: models.User = Depends(require_role("admin")),
+    user: Principal = Depends(require_role("admin")),
 ) -> List[models.AuditLog]:
     query = db.query(models.AuditLog)
     if patient_id:
         query = query.filter(models.AuditLog.patient_id == patient_id)
-    return query.order_by(models.AuditLog.timestamp.desc()).limit(limit).all()
+    return paginate(query, models.AuditLog.timestamp, models.AuditLog.id, response, cursor=cursor, limit=limit)
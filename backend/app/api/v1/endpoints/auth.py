@@ -10,13 +10,14 @@ from app.core.security import create_access_token, verify_password
 from app.db import models
 from app.db.session import get_db
 from app.schemas.auth import LoginRequest, Token
+from app.services.principals import Principal, principal_cache
 
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> models.User:
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Principal:
     settings = get_settings()
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -30,14 +31,22 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
             raise credentials_exception
     except JWTError as exc:
         raise credentials_exception from exc
-    user = db.query(models.User).filter(models.User.username == username).first()
-    if user is None:
+    if settings.trust_token_role_claim and payload.get("role"):
+        return Principal(username=username, role=payload["role"])
+    principal = principal_cache.get(username)
+    if principal is None:
+        user = db.query(models.User).filter(models.User.username == username).first()
+        if user is None:
+            raise credentials_exception
+        principal = Principal.from_user(user)
+        principal_cache.put(principal)
+    if not principal.is_active:
         raise credentials_exception
-    return user
+    return principal
 
 
 def require_role(role: str):
-    def _role_dependency(user: models.User = Depends(get_current_user)) -> models.User:
+    def _role_dependency(user: Principal = Depends(get_current_user)) -> Principal:
         if user.role != role and user.role != "admin":
             raise HTTPException(status_code=403, detail="Insufficient role")
         return user
@@ -0,0 +1,77 @@
+from datetime import datetime
+from typing import List, Literal, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.api.v1.endpoints.auth import get_current_user
+from app.core.config import get_settings
+from app.db.session import get_db
+from app.services.audit import log_audit
+from app.services.export import export_statement, stream_rows
+from app.services.fhir_mapper import BUNDLE_SEARCHSET, FHIR_CODES, iter_observation_bundle
+from app.services.principals import Principal
+
+
+router = APIRouter()
+settings = get_settings()
+
+FHIR_MEDIA_TYPE = "application/fhir+json"
+METRICS_BY_CODE = {code: metric for metric, code in FHIR_CODES.items()}
+
+
+def _metric_for_code(code: str) -> str:
+    """Accept ``8867-4``, ``http://loinc.org|8867-4`` or a plain metric name."""
+    code = code.split("|")[-1]
+    return METRICS_BY_CODE.get(code, code)
+
+
+def _date_range(dates: List[str]) -> Tuple[Optional[datetime], Optional[datetime]]:
+    start, end = None, None
+    for value in dates:
+        prefix, raw = value[:2], value[2:]
+        try:
+            when = datetime.fromisoformat(raw)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid date: {value}")
+        if prefix == "ge":
+            start = when
+        elif prefix == "le":
+            end = when
+        else:
+            raise HTTPException(status_code=400, detail="Only ge and le date prefixes are supported")
+    return start, end
+
+
+@router.get("/Observation")
+def search_observations(
+    subject: Optional[str] = None,
+    code: Optional[str] = None,
+    date: List[str] = Query([]),
+    count: Optional[int] = Query(None, alias="_count", ge=1),
+    bundle_type: Literal["searchset", "transaction"] = Query(BUNDLE_SEARCHSET, alias="_bundle"),
+    db: Session = Depends(get_db),
+    user: Principal = Depends(get_current_user),
+) -> StreamingResponse:
+    patient_id = subject.split("/")[-1] if subject else None
+    if patient_id is None and user.role != "admin":
+        raise HTTPException(status_code=403, detail="Searches without a subject require the admin role")
+    start, end = _date_range(date)
+    statement = export_statement(
+        patient_id=patient_id,
+        metric=_metric_for_code(code) if code else None,
+        start=start,
+        end=end,
+        limit=count,
+    )
+    log_audit(
+        db,
+        actor=user.username,
+        role=user.role,
+        action="fhir.observation.search",
+        patient_id=patient_id,
+        details={"code": code, "date": date, "count": count},
+    )
+    bundle = iter_observation_bundle(stream_rows(statement), bundle_type, chunk_size=settings.export_chunk_size)
+    return StreamingResponse(bundle, media_type=FHIR_MEDIA_TYPE)
@@ -1,13 +1,15 @@
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
 from app.api.v1.endpoints.auth import get_current_user, require_role
 from app.db import models
 from app.db.session import get_db
-from app.schemas.patient import PatientCreate, PatientOut, PatientUpdate
-from app.services.audit import log_audit
+from app.schemas.patient import PatientBatchCreate, PatientBatchResult, PatientCreate, PatientOut, PatientUpdate
+from app.services.audit import log_audit, log_audit_batch
+from app.services.principals import Principal
 
 
 router = APIRouter()
@@ -19,7 +21,7 @@ def list_patients(
     risk_profile: Optional[str] = None,
     assigned_clinician: Optional[str] = None,
     db: Session = Depends(get_db),
-    user: models.User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ) -> List[models.Patient]:
     query = db.query(models.Patient)
     if status:
@@ -37,7 +39,7 @@ def list_patients(
 def create_patient(
     payload: PatientCreate,
     db: Session = Depends(get_db),
-    user: models.User = Depends(require_role("admin")),
+    user: Principal = Depends(require_role("admin")),
 ) -> models.Patient:
     if db.query(models.Patient).filter(models.Patient.id == payload.id).first():
         raise HTTPException(status_code=409, detail="Patient already exists")
@@ -49,11 +51,31 @@ def create_patient(
     return patient
 
 
+@router.post("/batch", response_model=PatientBatchResult)
+def create_patients_batch(
+    payload: PatientBatchCreate,
+    db: Session = Depends(get_db),
+    user: Principal = Depends(require_role("admin")),
+) -> dict:
+    """Register many patients with one insert; ids that already exist are skipped."""
+    if not payload.items:
+        return {"created": 0, "skipped": 0}
+    created = db.execute(
+        insert(models.Patient)
+        .on_conflict_do_nothing(index_elements=[models.Patient.id])
+        .returning(models.Patient.id),
+        [item.dict() for item in payload.items],
+    ).scalars().all()
+    db.commit()
+    log_audit_batch(db, actor=user.username, role=user.role, action="patient.create", patient_ids=list(created))
+    return {"created": len(created), "skipped": len(payload.items) - len(created)}
+
+
 @router.get("/{patient_id}", response_model=PatientOut)
 def get_patient(
     patient_id: str,
     db: Session = Depends(get_db),
-    user: models.User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ) -> models.Patient:
     patient = db.query(models.Patient).filter(models.Patient.id == patient_id).first()
     if not patient:
@@ -67,7 +89,7 @@ def update_patient(
     patient_id: str,
     payload: PatientUpdate,
     db: Session = Depends(get_db),
-    user: models.User = Depends(require_role("clinician")),
+    user: Principal = Depends(require_role("clinician")),
 ) -> models.Patient:
     patient = db.query(models.Patient).filter(models.Patient.id == patient_id).first()
     if not patient:
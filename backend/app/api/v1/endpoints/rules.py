@@ -7,6 +7,7 @@ from app.api.v1.endpoints.auth import require_role
 from app.db import models
 from app.db.session import get_db
 from app.schemas.rule import RuleOut
+from app.services.principals import Principal
 from app.services.rules_engine import load_rules
 
 
@@ -16,6 +17,6 @@ router = APIRouter()
 @router.get("/", response_model=List[RuleOut])
 def list_rules(
     db: Session = Depends(get_db),
-    user: models.User = Depends(require_role("clinician")),
+    user: Principal = Depends(require_role("clinician")),
 ) -> List[models.RuleDefinition]:
     return load_rules(db)
@@ -1,115 +1,177 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Literal, Optional, Tuple, Union
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.api.v1.endpoints.auth import get_current_user
+from app.api.v1.endpoints.auth import get_current_user, require_role
+from app.api.v1.pagination import paginate
+from app.core.config import get_settings
 from app.db import models
 from app.db.session import get_db
-from app.schemas.vital import VitalIngest, VitalOut
-from app.services.audit import log_audit
-from app.services.events import connection_manager
-from app.services.rules_engine import derive_status, evaluate_correlation, evaluate_measurement
+from app.schemas.vital import VitalBatchIngest, VitalIngest, VitalOut, VitalRollupOut
+from app.services.audit import log_audit, log_audit_batch
+from app.services.export import EXPORT_MEDIA_TYPES, EXPORT_WRITERS, export_statement, stream_rows
+from app.services.ingest import (
+    PatientIngest,
+    broadcast_results,
+    evaluate_ingest,
+    ingest_items,
+    known_patient_ids,
+    persist_ingest,
+    restore_rule_state_on_rollback,
+)
+from app.services.ingest_queue import IngestQueueFull, ingest_queue
+from app.services.principals import Principal
 
 
 router = APIRouter()
+settings = get_settings()
+
+
+def _ingest(db: Session, payload: VitalIngest, user: Principal) -> PatientIngest:
+    patient = db.query(models.Patient).filter(models.Patient.id == payload.patient_id).first()
+    if not patient:
+        raise HTTPException(status_code=404, detail="Patient not found")
+
+    restore_rule_state_on_rollback(db, [payload.patient_id])
+    result = evaluate_ingest(db, payload.patient_id, payload.measurements)
+    persist_ingest(db, [result])
+    db.commit()
+    log_audit(db, actor=user.username, role=user.role, action="vitals.ingest", patient_id=payload.patient_id)
+    return result
+
+
+def _ingest_batch(db: Session, payload: VitalBatchIngest, user: Principal) -> Tuple[List[PatientIngest], List[dict]]:
+    results, response_items = ingest_items(db, payload.items)
+    db.commit()
+    log_audit_batch(
+        db,
+        actor=user.username,
+        role=user.role,
+        action="vitals.ingest",
+        patient_ids=[result.patient_id for result in results],
+    )
+    return results, response_items
+
+
+def _split_known(db: Session, items: List[VitalIngest]) -> Tuple[List[VitalIngest], List[dict]]:
+    """Items for known patients, and results for unknown ones like the synchronous batch path reports."""
+    known = known_patient_ids(db, (item.patient_id for item in items))
+    accepted = [item for item in items if item.patient_id in known]
+    rejected = [
+        {"patient_id": item.patient_id, "ingested": 0, "alerts_generated": 0, "error": "Patient not found"}
+        for item in items
+        if item.patient_id not in known
+    ]
+    return accepted, rejected
+
+
+def _enqueue(user: Principal, items: List[VitalIngest]) -> int:
+    # Runs on the event loop: the queue is an asyncio.Queue and is not thread-safe.
+    if not items:
+        return 0
+    try:
+        return ingest_queue.submit(actor=user.username, role=user.role, items=items)
+    except IngestQueueFull as exc:
+        raise HTTPException(
+            status_code=503,
+            detail="Ingest queue is full",
+            headers={"Retry-After": str(settings.ingest_queue_retry_after_seconds)},
+        ) from exc
 
 
 @router.post("/ingest")
 async def ingest_vitals(
     payload: VitalIngest,
     db: Session = Depends(get_db),
-    user: models.User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ) -> dict:
-    patient = db.query(models.Patient).filter(models.Patient.id == payload.patient_id).first()
-    if not patient:
-        raise HTTPException(status_code=404, detail="Patient not found")
+    if settings.ingest_write_behind:
+        accepted, rejected = await run_in_threadpool(_split_known, db, [payload])
+        if rejected:
+            raise HTTPException(status_code=404, detail="Patient not found")
+        return JSONResponse(status_code=202, content={"queued": _enqueue(user, accepted)})
+    # Database work runs in the threadpool so the event loop stays free for
+    # other requests and websocket traffic; only the broadcasts run here.
+    result = await run_in_threadpool(_ingest, db, payload, user)
+    await broadcast_results([result])
+    return {"ingested": result.ingested, "alerts_generated": result.alerts_generated}
 
-    ingested = 0
-    alerts_generated = 0
-    broadcast_alerts: List[models.Alert] = []
-    for measurement in payload.measurements:
-        status = measurement.status or derive_status(measurement.value, measurement.normal_low, measurement.normal_high)
-        alerts = evaluate_measurement(db, payload.patient_id, measurement.metric, measurement.value, measurement.timestamp)
-        for alert in alerts:
-            db.add(alert)
-            alerts_generated += 1
-            broadcast_alerts.append(alert)
-        if alerts:
-            if any(alert.severity == "critical" for alert in alerts):
-                status = "critical"
-            elif any(alert.severity == "warning" for alert in alerts):
-                status = "warning"
-        vital = models.VitalSign(
-            patient_id=payload.patient_id,
-            timestamp=measurement.timestamp,
-            metric=measurement.metric,
-            value=measurement.value,
-            unit=measurement.unit,
-            normal_low=measurement.normal_low,
-            normal_high=measurement.normal_high,
-            status=status,
-            source=measurement.source,
-        )
-        db.add(vital)
-        ingested += 1
-        correlation_alert = evaluate_correlation(db, payload.patient_id, measurement.timestamp)
-        if correlation_alert:
-            db.add(correlation_alert)
-            alerts_generated += 1
-            broadcast_alerts.append(correlation_alert)
-
-        await connection_manager.broadcast(
-            {
-                "type": "vital",
-                "payload": {
-                    "patient_id": payload.patient_id,
-                    "metric": measurement.metric,
-                    "value": measurement.value,
-                    "unit": measurement.unit,
-                    "timestamp": measurement.timestamp.isoformat(),
-                    "status": status,
-                },
-            }
-        )
 
-    db.commit()
-    for alert in broadcast_alerts:
-        await connection_manager.broadcast(
-            {
-                "type": "alert",
-                "payload": {
-                    "id": alert.id,
-                    "patient_id": alert.patient_id,
-                    "severity": alert.severity,
-                    "metric": alert.metric,
-                    "timestamp": alert.timestamp.isoformat(),
-                    "acknowledged": alert.acknowledged,
-                },
-            }
-        )
-    log_audit(db, actor=user.username, role=user.role, action="vitals.ingest", patient_id=payload.patient_id)
-    return {"ingested": ingested, "alerts_generated": alerts_generated}
+@router.post("/ingest/batch")
+async def ingest_vitals_batch(
+    payload: VitalBatchIngest,
+    db: Session = Depends(get_db),
+    user: Principal = Depends(get_current_user),
+) -> dict:
+    if settings.ingest_write_behind:
+        accepted, rejected = await run_in_threadpool(_split_known, db, payload.items)
+        return JSONResponse(status_code=202, content={"queued": _enqueue(user, accepted), "results": rejected})
+    results, response_items = await run_in_threadpool(_ingest_batch, db, payload, user)
+    await broadcast_results(results)
+    return {
+        "ingested": sum(result.ingested for result in results),
+        "alerts_generated": sum(result.alerts_generated for result in results),
+        "results": response_items,
+    }
+
+
+@router.get("/export")
+def export_vitals(
+    export_format: Literal["ndjson", "csv", "fhir"] = Query("ndjson", alias="format"),
+    patient_id: Optional[str] = None,
+    metric: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    user: Principal = Depends(require_role("admin")),
+) -> StreamingResponse:
+    statement = export_statement(patient_id=patient_id, metric=metric, start=start, end=end)
+    log_audit(
+        db,
+        actor=user.username,
+        role=user.role,
+        action="vitals.export",
+        patient_id=patient_id,
+        details={
+            "format": export_format,
+            "metric": metric,
+            "start": start.isoformat() if start else None,
+            "end": end.isoformat() if end else None,
+        },
+    )
+    writer = EXPORT_WRITERS[export_format]
+    return StreamingResponse(writer(stream_rows(statement)), media_type=EXPORT_MEDIA_TYPES[export_format])
 
 
-@router.get("/{patient_id}", response_model=List[VitalOut])
+@router.get("/{patient_id}", response_model=List[Union[VitalOut, VitalRollupOut]])
 def get_vitals(
     patient_id: str,
+    response: Response,
     metric: Optional[str] = None,
     start: Optional[datetime] = None,
     end: Optional[datetime] = None,
-    limit: int = 200,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    resolution: Literal["raw", "1m", "1h"] = "raw",
     db: Session = Depends(get_db),
-    user: models.User = Depends(get_current_user),
-) -> List[models.VitalSign]:
-    query = db.query(models.VitalSign).filter(models.VitalSign.patient_id == patient_id)
+    user: Principal = Depends(get_current_user),
+) -> List[Union[models.VitalSign, models.VitalRollup]]:
+    if resolution == "raw":
+        model, time_column, key_column = models.VitalSign, models.VitalSign.timestamp, models.VitalSign.id
+        query = db.query(model).filter(model.patient_id == patient_id)
+    else:
+        model, time_column, key_column = models.VitalRollup, models.VitalRollup.bucket_start, models.VitalRollup.metric
+        query = db.query(model).filter(model.patient_id == patient_id, model.resolution == resolution)
     if metric:
-        query = query.filter(models.VitalSign.metric == metric)
+        query = query.filter(model.metric == metric)
     if start:
-        query = query.filter(models.VitalSign.timestamp >= start)
+        query = query.filter(time_column >= start)
     if end:
-        query = query.filter(models.VitalSign.timestamp <= end)
-    vitals = query.order_by(models.VitalSign.timestamp.desc()).limit(limit).all()
+        query = query.filter(time_column <= end)
+    vitals = paginate(query, time_column, key_column, response, cursor=cursor, limit=limit)
     log_audit(db, actor=user.username, role=user.role, action="vitals.get", patient_id=patient_id)
     return vitals
@@ -0,0 +1,71 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+from app.core.config import get_settings
+
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(timestamp: Optional[datetime], key: Any) -> str:
+    raw = json.dumps([timestamp and timestamp.isoformat(), key], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, key_type: type, timed: bool = True) -> Tuple[Optional[datetime], Any]:
+    """Decode a cursor, rejecting any whose key is not a ``key_type`` with a 400.
+
+    ``timed`` cursors carry an ISO timestamp; key-only cursors carry ``null``.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        valid_timestamp = isinstance(timestamp, str) if timed else timestamp is None
+        if not valid_timestamp or isinstance(key, bool) or not isinstance(key, key_type):
+            raise TypeError("cursor has the wrong shape")
+        return (datetime.fromisoformat(timestamp) if timed else None), key
+    except (binascii.Error, ValueError, TypeError) as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+
+
+def paginate(
+    query: Query,
+    time_column: Optional[Any],
+    key_column,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> List:
+    """Return one page of ``query`` ordered newest first by ``(time_column, key_column)``.
+
+    With ``time_column=None`` pages are ordered by ``key_column`` ascending
+    instead. The page size is capped by ``max_page_size``. When more rows
+    exist, an opaque cursor for the next page is set on the ``X-Next-Cursor``
+    header.
+    """
+    settings = get_settings()
+    size = min(max(limit or settings.default_page_size, 1), settings.max_page_size)
+    if time_column is None:
+        if cursor:
+            _, key = decode_cursor(cursor, key_column.type.python_type, timed=False)
+            query = query.filter(key_column > key)
+        query = query.order_by(key_column)
+    else:
+        if cursor:
+            timestamp, key = decode_cursor(cursor, key_column.type.python_type)
+            query = query.filter(tuple_(time_column, key_column) < tuple_(timestamp, key))
+        query = query.order_by(time_column.desc(), key_column.desc())
+    rows = query.limit(size + 1).all()
+    if len(rows) > size:
+        rows = rows[:size]
+        last = rows[-1]
+        timestamp = getattr(last, time_column.key) if time_column is not None else None
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(timestamp, getattr(last, key_column.key))
+    return rows
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import alerts, analytics, auth, patients, rules, vitals, audit
+from app.api.v1.endpoints import alerts, analytics, auth, fhir, patients, rules, vitals, audit
 
 api_router = APIRouter()
 
@@ -11,3 +11,4 @@ api_router.include_router(alerts.router, prefix="/alerts", tags=["alerts"])
 api_router.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
 api_router.include_router(rules.router, prefix="/rules", tags=["rules"])
 api_router.include_router(audit.router, prefix="/audit", tags=["audit"])
+api_router.include_router(fhir.router, prefix="/fhir", tags=["fhir"])
@@ -1,5 +1,5 @@
 from functools import lru_cache
-from pydantic import BaseSettings, Field
+from pydantic import BaseSettings, Field, validator
 
 
 class Settings(BaseSettings):
@@ -13,6 +13,39 @@ class Settings(BaseSettings):
         env="DATABASE_URL",
     )
     cors_origins: str = Field("*", env="CORS_ORIGINS")
+    rule_index_ttl_seconds: float = Field(60.0, env="RULE_INDEX_TTL_SECONDS")
+    ingest_write_behind: bool = Field(False, env="INGEST_WRITE_BEHIND")
+    ingest_queue_maxsize: int = Field(1000, env="INGEST_QUEUE_MAXSIZE")
+    ingest_queue_workers: int = Field(2, env="INGEST_QUEUE_WORKERS")
+    ingest_flush_batch_size: int = Field(2000, env="INGEST_FLUSH_BATCH_SIZE")
+    ingest_flush_interval_seconds: float = Field(0.25, env="INGEST_FLUSH_INTERVAL_SECONDS")
+    ingest_queue_retry_after_seconds: int = Field(1, env="INGEST_QUEUE_RETRY_AFTER_SECONDS")
+    ingest_dead_letter_path: str = Field("ingest_dead_letter.ndjson", env="INGEST_DEAD_LETTER_PATH")
+    ws_send_queue_size: int = Field(256, env="WS_SEND_QUEUE_SIZE")
+    ws_slow_consumer_policy: str = Field("drop_oldest", env="WS_SLOW_CONSUMER_POLICY")
+    principal_cache_size: int = Field(1024, env="PRINCIPAL_CACHE_SIZE")
+    principal_cache_ttl_seconds: float = Field(60.0, env="PRINCIPAL_CACHE_TTL_SECONDS")
+    trust_token_role_claim: bool = Field(False, env="TRUST_TOKEN_ROLE_CLAIM")
+    vitals_partition_interval: str = Field("day", env="VITALS_PARTITION_INTERVAL")
+    vitals_partitions_ahead: int = Field(7, env="VITALS_PARTITIONS_AHEAD")
+    vitals_retention_days: int = Field(0, env="VITALS_RETENTION_DAYS")
+    vitals_partition_maintenance_seconds: float = Field(3600.0, env="VITALS_PARTITION_MAINTENANCE_SECONDS")
+    default_page_size: int = Field(200, env="DEFAULT_PAGE_SIZE")
+    max_page_size: int = Field(1000, env="MAX_PAGE_SIZE")
+    analytics_cache_size: int = Field(4096, env="ANALYTICS_CACHE_SIZE")
+    analytics_cache_ttl_seconds: float = Field(30.0, env="ANALYTICS_CACHE_TTL_SECONDS")
+    export_chunk_size: int = Field(1000, env="EXPORT_CHUNK_SIZE")
+    audit_mode: str = Field("sync", env="AUDIT_MODE")
+    audit_flush_batch_size: int = Field(500, env="AUDIT_FLUSH_BATCH_SIZE")
+    audit_flush_interval_seconds: float = Field(1.0, env="AUDIT_FLUSH_INTERVAL_SECONDS")
+    audit_buffer_max_entries: int = Field(100000, env="AUDIT_BUFFER_MAX_ENTRIES")
+    audit_dead_letter_path: str = Field("audit_dead_letter.ndjson", env="AUDIT_DEAD_LETTER_PATH")
+
+    @validator("audit_mode")
+    def _check_audit_mode(cls, value: str) -> str:
+        if value not in ("sync", "buffered"):
+            raise ValueError("AUDIT_MODE must be 'sync' or 'buffered'")
+        return value
 
     class Config:
         case_sensitive = False
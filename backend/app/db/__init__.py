@@ -1,3 +1,3 @@
-from app.db.models import Alert, AuditLog, Patient, RuleDefinition, User, VitalSign
+from app.db.models import Alert, AuditLog, Patient, RuleDefinition, User, VitalLatest, VitalRollup, VitalSign
 
-__all__ = ["Alert", "AuditLog", "Patient", "RuleDefinition", "User", "VitalSign"]
+__all__ = ["Alert", "AuditLog", "Patient", "RuleDefinition", "User", "VitalLatest", "VitalRollup", "VitalSign"]
@@ -2,6 +2,7 @@ import uuid
 from datetime import datetime
 
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     Column,
     DateTime,
@@ -51,11 +52,14 @@ class Patient(Base):
 
 class VitalSign(Base):
     __tablename__ = "vital_signs"
+    # Range-partitioned by measurement time on PostgreSQL; partitions are
+    # created ahead of time and expired by app.services.partitions.
+    __table_args__ = {"postgresql_partition_by": "RANGE (timestamp)"}
 
-    id = Column(Integer, primary_key=True, index=True)
-    patient_id = Column(String(32), ForeignKey("patients.id"), nullable=False, index=True)
-    timestamp = Column(DateTime, nullable=False, index=True)
-    metric = Column(String(32), nullable=False, index=True)
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    patient_id = Column(String(32), ForeignKey("patients.id"), nullable=False)
+    timestamp = Column(DateTime, primary_key=True, nullable=False)
+    metric = Column(String(32), nullable=False)
     value = Column(Float, nullable=False)
     unit = Column(String(16), nullable=False)
     normal_low = Column(Float, nullable=True)
@@ -67,6 +71,39 @@ class VitalSign(Base):
     patient = relationship("Patient", back_populates="vitals")
 
 
+class VitalRollup(Base):
+    __tablename__ = "vital_rollups"
+
+    patient_id = Column(String(32), ForeignKey("patients.id"), primary_key=True)
+    resolution = Column(String(8), primary_key=True)
+    metric = Column(String(32), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    count = Column(Integer, nullable=False)
+    sum = Column(Float, nullable=False)
+    m2 = Column(Float, nullable=False, default=0.0, server_default="0")
+    min = Column(Float, nullable=False)
+    max = Column(Float, nullable=False)
+
+    @property
+    def avg(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    @property
+    def stddev(self) -> float:
+        return (self.m2 / self.count) ** 0.5 if self.count else 0.0
+
+
+class VitalLatest(Base):
+    """Most recent reading per patient and metric, kept up to date on ingest."""
+
+    __tablename__ = "vital_latest"
+
+    patient_id = Column(String(32), ForeignKey("patients.id"), primary_key=True)
+    metric = Column(String(32), primary_key=True)
+    value = Column(Float, nullable=False)
+    timestamp = Column(DateTime, nullable=False)
+
+
 class Alert(Base):
     __tablename__ = "alerts"
 
@@ -109,3 +146,4 @@ class RuleDefinition(Base):
 
 
 Index("ix_vitals_patient_metric_time", VitalSign.patient_id, VitalSign.metric, VitalSign.timestamp)
+Index("ix_vitals_patient_time", VitalSign.patient_id, VitalSign.timestamp)
@@ -1,5 +1,7 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from typing import Callable
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.core.config import get_settings
 
@@ -16,3 +18,33 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def on_commit(session: Session, callback: Callable[[], None]) -> None:
+    """Run ``callback`` once after ``session``'s current transaction commits.
+
+    Callbacks queued more than once per transaction run once; they are
+    discarded if the transaction rolls back or the session is closed first.
+    """
+    session.info.setdefault("on_commit", {})[callback] = None
+
+
+def on_rollback(session: Session, callback: Callable[[], None]) -> None:
+    """Run ``callback`` once if ``session``'s current transaction ends without committing."""
+    session.info.setdefault("on_rollback", {})[callback] = None
+
+
+@event.listens_for(Session, "after_commit")
+def _run_commit_callbacks(session: Session) -> None:
+    session.info.pop("on_rollback", None)
+    for callback in session.info.pop("on_commit", {}):
+        callback()
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _run_rollback_callbacks(session: Session, transaction) -> None:
+    if transaction.parent is not None:
+        return
+    session.info.pop("on_commit", None)
+    for callback in session.info.pop("on_rollback", {}):
+        callback()
@@ -1,17 +1,33 @@
+import asyncio
+import json
+import logging
+from typing import List, Optional
+
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from jose import JWTError, jwt
 
+from app.api.v1.pagination import NEXT_CURSOR_HEADER
 from app.api.v1.router import api_router
 from app.core.config import get_settings
+from app.db import models
 from app.db.base import Base
 from app.db.session import engine, SessionLocal
 from pathlib import Path
 
 from app.seed import seed_patients, seed_rules, seed_users
+from app.services.audit import AUDIT_MODE_BUFFERED, audit_writer
 from app.services.events import connection_manager
+from app.services.ingest_queue import ingest_queue
+from app.services.partitions import maintain_partitions
+from app.services.rollups import seed_latest
+from app.services.rules_engine import correlation_state, escalation_tracker
+from app.services.running_stats import window_start
+from app.services.websocket_manager import ENCODING_JSON, supported_encodings
 
 
+logger = logging.getLogger(__name__)
 settings = get_settings()
 
 app = FastAPI(title=settings.app_name)
@@ -22,6 +38,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 app.include_router(api_router, prefix=settings.api_v1_prefix)
@@ -32,29 +49,132 @@ def on_startup() -> None:
     Base.metadata.create_all(bind=engine)
     db = SessionLocal()
     try:
+        maintain_partitions(db)
         seed_users(db)
         seed_rules(db)
         data_path = Path(__file__).resolve().parents[1] / "data" / "seed_patients.json"
         seed_patients(db, data_path=data_path)
+        seed_latest(db, since=window_start())
+        escalation_tracker.rebuild(db)
+        correlation_state.rebuild(db)
+    finally:
+        db.close()
+    if settings.audit_mode == AUDIT_MODE_BUFFERED:
+        audit_writer.start()
+
+
+def _run_partition_maintenance() -> None:
+    db = SessionLocal()
+    try:
+        maintain_partitions(db)
     finally:
         db.close()
 
 
+async def _partition_maintenance_loop() -> None:
+    while True:
+        await asyncio.sleep(settings.vitals_partition_maintenance_seconds)
+        try:
+            await run_in_threadpool(_run_partition_maintenance)
+        except Exception:
+            logger.exception("vital_signs partition maintenance failed")
+
+
+_partition_task: Optional[asyncio.Task] = None
+
+
+@app.on_event("startup")
+async def start_background_tasks() -> None:
+    global _partition_task
+    if settings.ingest_write_behind:
+        await ingest_queue.start()
+    _partition_task = asyncio.create_task(_partition_maintenance_loop())
+
+
+@app.on_event("shutdown")
+async def stop_background_tasks() -> None:
+    if _partition_task is not None:
+        _partition_task.cancel()
+    await ingest_queue.stop()
+
+
+@app.on_event("shutdown")
+def stop_audit_writer() -> None:
+    audit_writer.close()
+
+
 @app.get("/health")
 def health() -> dict:
     return {"status": "ok"}
 
 
+def _clinician_patient_ids(clinician: str) -> List[str]:
+    db = SessionLocal()
+    try:
+        rows = db.query(models.Patient.id).filter(models.Patient.assigned_clinician == clinician).all()
+        return [patient_id for (patient_id,) in rows]
+    finally:
+        db.close()
+
+
+async def _handle_stream_command(websocket: WebSocket, text: str) -> None:
+    """Apply a subscribe/unsubscribe/reset command sent by a stream client.
+
+    Commands look like ``{"action": "subscribe", "patient_ids": [...],
+    "clinician": "clinician1", "alerts_only": true, "all_alerts": false}``;
+    every field besides ``action`` is optional. A subscribe that carries
+    ``patient_ids`` or ``clinician`` filters the stream from then on, even if it
+    resolves to no patients; ``{"action": "reset"}`` restores the full stream.
+    Clinician subscriptions are resolved to that clinician's patients at the
+    time of the command.
+    """
+    try:
+        command = json.loads(text)
+        action = command["action"]
+        patient_ids = command.get("patient_ids")
+        patient_ids = None if patient_ids is None else list(patient_ids)
+        clinician = command.get("clinician")
+        alerts_only = command.get("alerts_only")
+        all_alerts = command.get("all_alerts")
+    except (ValueError, KeyError, TypeError, AttributeError):
+        await connection_manager.send_personal(websocket, {"type": "error", "payload": {"detail": "Invalid command"}})
+        return
+    if action not in ("subscribe", "unsubscribe", "reset"):
+        await connection_manager.send_personal(websocket, {"type": "error", "payload": {"detail": "Unknown action"}})
+        return
+    if clinician:
+        clinician_patients = await run_in_threadpool(_clinician_patient_ids, clinician)
+        if not clinician_patients:
+            await connection_manager.send_personal(
+                websocket, {"type": "warning", "payload": {"detail": f"Clinician {clinician} has no patients"}}
+            )
+        patient_ids = (patient_ids or []) + clinician_patients
+    if action == "subscribe":
+        connection_manager.subscribe(websocket, patient_ids, alerts_only=alerts_only, all_alerts=all_alerts)
+    elif action == "unsubscribe":
+        connection_manager.unsubscribe(websocket, patient_ids or [], alerts_only=alerts_only, all_alerts=all_alerts)
+    else:
+        connection_manager.reset(websocket)
+    await connection_manager.send_personal(
+        websocket, {"type": "subscriptions", "payload": connection_manager.subscriptions(websocket)}
+    )
+
+
 @app.websocket("/ws/stream")
-async def websocket_stream(websocket: WebSocket, token: str) -> None:
+async def websocket_stream(websocket: WebSocket, token: str, encoding: str = ENCODING_JSON) -> None:
     try:
         jwt.decode(token, settings.secret_key, algorithms=["HS256"])
     except JWTError:
         await websocket.close(code=1008)
         return
-    await connection_manager.connect(websocket)
+    if encoding not in supported_encodings():
+        await websocket.close(code=1003)
+        return
+    await connection_manager.connect(websocket, encoding=encoding)
     try:
         while True:
-            await websocket.receive_text()
+            await _handle_stream_command(websocket, await websocket.receive_text())
     except WebSocketDisconnect:
+        pass
+    finally:
         connection_manager.disconnect(websocket)
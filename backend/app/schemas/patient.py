@@ -21,6 +21,15 @@ class PatientCreate(PatientBase):
     id: str
 
 
+class PatientBatchCreate(BaseModel):
+    items: List[PatientCreate]
+
+
+class PatientBatchResult(BaseModel):
+    created: int
+    skipped: int
+
+
 class PatientUpdate(BaseModel):
     monitoring_status: Optional[str] = None
     assigned_clinician: Optional[str] = None
@@ -1,7 +1,7 @@
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, validator
 
 
 class VitalMeasurement(BaseModel):
@@ -14,15 +14,41 @@ class VitalMeasurement(BaseModel):
     status: Optional[str] = None
     source: str
 
+    @validator("timestamp")
+    def _naive_utc(cls, value: datetime) -> datetime:
+        # Stored and in-memory timestamps are naive UTC; mixing in aware ones breaks comparisons.
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
 
 class VitalIngest(BaseModel):
     patient_id: str
     measurements: List[VitalMeasurement]
 
 
+class VitalBatchIngest(BaseModel):
+    items: List[VitalIngest]
+
+
 class VitalOut(VitalMeasurement):
     id: int
     patient_id: str
 
     class Config:
         orm_mode = True
+
+
+class VitalRollupOut(BaseModel):
+    patient_id: str
+    metric: str
+    resolution: str
+    bucket_start: datetime
+    count: int
+    avg: float
+    stddev: float
+    min: float
+    max: float
+
+    class Config:
+        orm_mode = True
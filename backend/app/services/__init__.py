@@ -1 +1 @@
-__all__ = ["analytics", "audit", "events", "fhir_mapper", "rules_engine", "websocket_manager"]
+__all__ = ["analytics", "audit", "dead_letter", "events", "export", "fhir_mapper", "ingest", "ingest_queue", "partitions", "principals", "rollups", "rules_engine", "running_stats", "websocket_manager"]
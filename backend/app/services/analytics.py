@@ -1,10 +1,23 @@
-from datetime import datetime, timedelta
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import partial
 from statistics import mean, pstdev
-from typing import Dict, List
+from typing import Dict, Iterable, List, Optional
 
-from sqlalchemy.orm import Session
+import numpy as np
+from sqlalchemy import event, func
+from sqlalchemy.orm import Query, Session, object_session
 
+from app.core.config import get_settings
 from app.db import models
+from app.db.session import on_commit
+from app.services.running_stats import RunningStats, window_start
+
+BASELINE_RISK = {"low": 0.2, "medium": 0.4, "high": 0.6}
+DEFAULT_BASELINE_RISK = 0.3
 
 
 def _metric_summary(values: List[float]) -> Dict[str, float]:
@@ -13,12 +26,31 @@ def _metric_summary(values: List[float]) -> Dict[str, float]:
     return {"avg": mean(values), "min": min(values), "max": max(values)}
 
 
+def _stats_summary(stats: RunningStats) -> Dict[str, float]:
+    if not stats.count:
+        return {"avg": 0.0, "min": 0.0, "max": 0.0}
+    return {"avg": stats.mean, "min": stats.min, "max": stats.max}
+
+
+def risk_score_from_counts(critical: int, warning: int, baseline_risk: str) -> float:
+    base = BASELINE_RISK.get(baseline_risk, DEFAULT_BASELINE_RISK)
+    score = base + min(0.4, critical * 0.1) + min(0.2, warning * 0.05)
+    return min(1.0, score)
+
+
 def compute_risk_score(alerts: List[models.Alert], baseline_risk: str) -> float:
-    base = {"low": 0.2, "medium": 0.4, "high": 0.6}.get(baseline_risk, 0.3)
     critical = len([a for a in alerts if a.severity == "critical"])
     warning = len([a for a in alerts if a.severity == "warning"])
-    score = base + min(0.4, critical * 0.1) + min(0.2, warning * 0.05)
-    return min(1.0, score)
+    return risk_score_from_counts(critical, warning, baseline_risk)
+
+
+def anomaly_score_from_stats(stats: RunningStats, latest: float) -> float:
+    """``compute_anomaly_score`` over a window summarized by ``stats``."""
+    if stats.count < 5:
+        return 0.0
+    sd = math.sqrt(stats.variance) or 1.0
+    z = abs((latest - stats.mean) / sd)
+    return min(1.0, z / 5)
 
 
 def compute_anomaly_score(values: List[float]) -> float:
@@ -31,38 +63,250 @@ def compute_anomaly_score(values: List[float]) -> float:
     return min(1.0, z / 5)
 
 
-def compute_patient_analytics(db: Session, patient_id: str) -> Dict:
-    lookback = datetime.utcnow() - timedelta(hours=24)
-    vitals = (
-        db.query(models.VitalSign)
-        .filter(models.VitalSign.patient_id == patient_id, models.VitalSign.timestamp >= lookback)
+def compute_trend(alert_count: int, critical: int) -> str:
+    trend = "stable"
+    if alert_count >= 3:
+        trend = "deteriorating"
+    if critical >= 2:
+        trend = "critical"
+    return trend
+
+
+def compute_patient_analytics(db: Session, patient_id: str, now: Optional[datetime] = None) -> Dict:
+    """Summarize the last 24 hours from the persisted 1-hour rollups.
+
+    At most one rollup row per metric and hour is read and merged, and latest
+    values come from ``vital_latest``, so the cost does not grow with the
+    number of readings. The window is kept at hourly
+    granularity, so the oldest hour is included whole.
+    """
+    cutoff = window_start(now)
+    rollup = models.VitalRollup
+    metrics: Dict[str, RunningStats] = {}
+    for metric, count, total, m2, low, high in (
+        db.query(rollup.metric, rollup.count, rollup.sum, rollup.m2, rollup.min, rollup.max)
+        .filter(rollup.patient_id == patient_id, rollup.resolution == "1h", rollup.bucket_start >= cutoff)
+        .all()
+    ):
+        metrics.setdefault(metric, RunningStats()).merge(RunningStats.from_rollup(count, total, m2, low, high))
+    latest = dict(
+        db.query(models.VitalLatest.metric, models.VitalLatest.value)
+        .filter(models.VitalLatest.patient_id == patient_id, models.VitalLatest.timestamp >= cutoff)
         .all()
     )
-    alerts = (
-        db.query(models.Alert)
-        .filter(models.Alert.patient_id == patient_id, models.Alert.timestamp >= lookback)
+    alerts = dict(
+        db.query(models.Alert.severity, func.count())
+        .filter(models.Alert.patient_id == patient_id, models.Alert.timestamp >= cutoff)
+        .group_by(models.Alert.severity)
         .all()
     )
-    patient = db.query(models.Patient).filter(models.Patient.id == patient_id).first()
-    metrics: Dict[str, List[float]] = {}
-    for v in vitals:
-        metrics.setdefault(v.metric, []).append(v.value)
+    patient = db.get(models.Patient, patient_id)
 
-    summary = {metric: _metric_summary(values) for metric, values in metrics.items()}
+    summary = {metric: _stats_summary(stats) for metric, stats in metrics.items()}
     anomaly_score = 0.0
     if metrics:
-        anomaly_score = max(compute_anomaly_score(values) for values in metrics.values())
-
-    trend = "stable"
-    if len(alerts) >= 3:
-        trend = "deteriorating"
-    if len([a for a in alerts if a.severity == "critical"]) >= 2:
-        trend = "critical"
+        anomaly_score = max(anomaly_score_from_stats(stats, latest.get(metric, stats.mean)) for metric, stats in metrics.items())
 
+    critical = alerts.get("critical", 0)
+    warning = alerts.get("warning", 0)
     return {
         "patient_id": patient_id,
-        "risk_score": compute_risk_score(alerts, patient.risk_profile if patient else "medium"),
-        "trend": trend,
+        "risk_score": risk_score_from_counts(critical, warning, patient.risk_profile if patient else "medium"),
+        "trend": compute_trend(sum(alerts.values()), critical),
         "metrics": summary,
         "anomaly_score": anomaly_score,
     }
+
+
+class AnalyticsCache:
+    """LRU cache of patient analytics summaries with a TTL.
+
+    Ingest invalidates the patients it wrote for and alert updates invalidate
+    their patient. Each patient also carries a generation number: a result
+    computed before an invalidation is not stored, so a slow computation
+    cannot put back data that is already stale.
+    """
+
+    def __init__(self, maxsize: int, ttl_seconds: float) -> None:
+        self._maxsize = maxsize
+        self._ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple[float, Dict]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, patient_id: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(patient_id)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[patient_id]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(patient_id)
+            self.hits += 1
+            return entry[1]
+
+    def generation(self, patient_id: str) -> int:
+        with self._lock:
+            return self._generations.get(patient_id, 0)
+
+    def put(self, patient_id: str, payload: Dict, generation: int) -> None:
+        if self._maxsize <= 0 or self._ttl_seconds <= 0:
+            return
+        with self._lock:
+            if self._generations.get(patient_id, 0) != generation:
+                return
+            self._entries[patient_id] = (time.monotonic() + self._ttl_seconds, payload)
+            self._entries.move_to_end(patient_id)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, patient_ids: Iterable[str]) -> None:
+        with self._lock:
+            for patient_id in patient_ids:
+                self._entries.pop(patient_id, None)
+                self._generations[patient_id] = self._generations.get(patient_id, 0) + 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "maxsize": self._maxsize}
+
+
+settings = get_settings()
+
+analytics_cache = AnalyticsCache(
+    maxsize=settings.analytics_cache_size,
+    ttl_seconds=settings.analytics_cache_ttl_seconds,
+)
+
+
+@event.listens_for(models.Alert, "after_update")
+def _invalidate_alert_patient(mapper, connection, target) -> None:
+    on_commit(object_session(target), partial(analytics_cache.invalidate, [target.patient_id]))
+
+
+def cached_patient_analytics(db: Session, patient_id: str) -> Dict:
+    payload = analytics_cache.get(patient_id)
+    if payload is None:
+        generation = analytics_cache.generation(patient_id)
+        payload = compute_patient_analytics(db, patient_id)
+        analytics_cache.put(patient_id, payload, generation)
+    return payload
+
+
+def risk_scores(critical: np.ndarray, warning: np.ndarray, baseline_risks: List[str]) -> np.ndarray:
+    """Vectorized ``risk_score_from_counts``."""
+    base = np.array([BASELINE_RISK.get(risk, DEFAULT_BASELINE_RISK) for risk in baseline_risks], dtype=float)
+    return np.minimum(1.0, base + np.minimum(0.4, critical * 0.1) + np.minimum(0.2, warning * 0.05))
+
+
+def anomaly_scores(count: np.ndarray, avg: np.ndarray, variance: np.ndarray, latest: np.ndarray) -> np.ndarray:
+    """Vectorized ``anomaly_score_from_stats``."""
+    sd = np.sqrt(np.maximum(variance, 0.0))
+    sd[sd == 0] = 1.0
+    scores = np.minimum(1.0, np.abs(latest - avg) / sd / 5)
+    scores[count < 5] = 0.0
+    return scores
+
+
+def cohort_query(
+    db: Session,
+    clinician: Optional[str] = None,
+    risk_profile: Optional[str] = None,
+    monitoring_status: Optional[str] = None,
+) -> Query:
+    """``(id, risk_profile)`` of the patients matching the cohort filters."""
+    query = db.query(models.Patient.id, models.Patient.risk_profile)
+    if clinician:
+        query = query.filter(models.Patient.assigned_clinician == clinician)
+    if risk_profile:
+        query = query.filter(models.Patient.risk_profile == risk_profile)
+    if monitoring_status:
+        query = query.filter(models.Patient.monitoring_status == monitoring_status)
+    return query
+
+
+def compute_cohort_analytics(db: Session, patients_query: Query, now: Optional[datetime] = None) -> List[Dict]:
+    """Analytics for the patients selected by ``patients_query``, ordered by patient id.
+
+    Each table is read with one aggregate query joined to ``patients_query``
+    as a subquery. Metric windows are merged from the 1-hour rollups in SQL,
+    latest values come from ``vital_latest``, and scoring is done over NumPy
+    arrays. Results match
+    ``compute_patient_analytics``.
+    """
+    cutoff = window_start(now)
+    patients = patients_query.order_by(models.Patient.id).all()
+    if not patients:
+        return []
+    cohort = patients_query.with_entities(models.Patient.id).subquery()
+    patient_ids = [patient_id for patient_id, _ in patients]
+    index = {patient_id: position for position, patient_id in enumerate(patient_ids)}
+
+    critical = np.zeros(len(patients))
+    warning = np.zeros(len(patients))
+    alert_count = np.zeros(len(patients))
+    alert_rows = (
+        db.query(models.Alert.patient_id, models.Alert.severity, func.count())
+        .join(cohort, cohort.c.id == models.Alert.patient_id)
+        .filter(models.Alert.timestamp >= cutoff)
+        .group_by(models.Alert.patient_id, models.Alert.severity)
+        .all()
+    )
+    for patient_id, severity, count in alert_rows:
+        alert_count[index[patient_id]] += count
+        if severity == "critical":
+            critical[index[patient_id]] = count
+        elif severity == "warning":
+            warning[index[patient_id]] = count
+
+    rollup = models.VitalRollup
+    total_count = func.sum(rollup.count)
+    total_sum = func.sum(rollup.sum)
+    # Chan's merge over buckets: M2 = sum(m2_i) + sum(sum_i^2 / n_i) - sum(sum_i)^2 / N.
+    total_m2 = func.sum(rollup.m2 + rollup.sum * rollup.sum / rollup.count) - total_sum * total_sum / total_count
+    metric_rows = (
+        db.query(rollup.patient_id, rollup.metric, total_count, total_sum, total_m2, func.min(rollup.min), func.max(rollup.max))
+        .join(cohort, cohort.c.id == rollup.patient_id)
+        .filter(rollup.resolution == "1h", rollup.bucket_start >= cutoff)
+        .group_by(rollup.patient_id, rollup.metric)
+        .order_by(rollup.patient_id, rollup.metric)
+        .all()
+    )
+    latest = dict(
+        ((patient_id, metric), value)
+        for patient_id, metric, value in db.query(models.VitalLatest.patient_id, models.VitalLatest.metric, models.VitalLatest.value)
+        .join(cohort, cohort.c.id == models.VitalLatest.patient_id)
+        .filter(models.VitalLatest.timestamp >= cutoff)
+        .all()
+    )
+
+    summaries: List[Dict[str, Dict[str, float]]] = [{} for _ in patients]
+    anomaly = np.zeros(len(patients))
+    if metric_rows:
+        counts = np.array([row[2] for row in metric_rows], dtype=float)
+        avgs = np.array([row[3] for row in metric_rows], dtype=float) / counts
+        variances = np.array([row[4] for row in metric_rows], dtype=float) / counts
+        latest_values = np.array([latest.get((row[0], row[1]), avg) for row, avg in zip(metric_rows, avgs)], dtype=float)
+        owners = np.array([index[row[0]] for row in metric_rows])
+        np.maximum.at(anomaly, owners, anomaly_scores(counts, avgs, variances, latest_values))
+        for (patient_id, metric, _, _, _, low, high), avg in zip(metric_rows, avgs.tolist()):
+            summaries[index[patient_id]][metric] = {"avg": avg, "min": low, "max": high}
+
+    risk = risk_scores(critical, warning, [risk_profile for _, risk_profile in patients])
+    trend = np.where(critical >= 2, "critical", np.where(alert_count >= 3, "deteriorating", "stable"))
+    return [
+        {
+            "patient_id": patient_id,
+            "risk_score": risk_score,
+            "trend": patient_trend,
+            "metrics": summary,
+            "anomaly_score": anomaly_score,
+        }
+        for patient_id, risk_score, patient_trend, summary, anomaly_score in zip(
+            patient_ids, risk.tolist(), trend.tolist(), summaries, anomaly.tolist()
+        )
+    ]
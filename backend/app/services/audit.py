@@ -1,8 +1,147 @@
-from typing import Dict, Any, Optional
+import atexit
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional
 
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
 
+from app.core.config import get_settings
 from app.db import models
+from app.db.session import SessionLocal
+from app.services.dead_letter import DeadLetterFile
+
+
+logger = logging.getLogger(__name__)
+
+AUDIT_MODE_SYNC = "sync"
+AUDIT_MODE_BUFFERED = "buffered"
+
+
+class AuditWriter:
+    """Collects audit entries in memory and bulk-inserts them in the background.
+
+    Entries are flushed every ``flush_interval`` seconds or as soon as
+    ``batch_size`` are pending, and once more on ``close`` (also registered to
+    run at interpreter exit). When a bulk insert fails the entries are retried
+    one at a time, and any the database still rejects go to ``dead_letter`` so
+    they cannot block later writes. If the database is unreachable the entries
+    stay buffered for the next attempt; beyond ``max_pending`` entries the
+    oldest are dropped and counted in ``dropped``.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float, max_pending: int, dead_letter: DeadLetterFile) -> None:
+        self._dead_letter = dead_letter
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._max_pending = max_pending
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: List[Dict[str, Any]] = []
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        atexit.register(self.close)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._stopping.set()
+            self._wakeup.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._pending.extend(rows)
+            self._trim()
+            full = len(self._pending) >= self._batch_size
+        if full:
+            self._wakeup.set()
+
+    def _trim(self) -> None:
+        overflow = len(self._pending) - self._max_pending
+        if overflow > 0:
+            del self._pending[:overflow]
+            self.dropped += overflow
+            logger.error("Audit buffer full; dropped %d oldest entries (%d in total)", overflow, self.dropped)
+
+    def flush(self) -> None:
+        with self._flush_lock:
+            with self._lock:
+                rows, self._pending = self._pending, []
+            if not rows:
+                return
+            try:
+                self._insert(rows)
+                return
+            except OperationalError:
+                logger.exception("Failed to flush %d audit entries; keeping them buffered", len(rows))
+                self._requeue(rows)
+                return
+            except Exception:
+                logger.exception("Failed to flush %d audit entries; retrying one at a time", len(rows))
+            for index, row in enumerate(rows):
+                try:
+                    self._insert([row])
+                except OperationalError:
+                    logger.exception("Failed to flush %d audit entries; keeping them buffered", len(rows) - index)
+                    self._requeue(rows[index:])
+                    return
+                except Exception as exc:
+                    logger.exception("Audit entry for %s rejected by the database; dead-lettered", row["action"])
+                    self._dead_letter.write(row, repr(exc))
+
+    @staticmethod
+    def _insert(rows: List[Dict[str, Any]]) -> None:
+        db = SessionLocal()
+        try:
+            db.execute(insert(models.AuditLog), rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _requeue(self, rows: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._pending[:0] = rows
+            self._trim()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wakeup.wait(self._flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+settings = get_settings()
+
+audit_writer = AuditWriter(
+    batch_size=settings.audit_flush_batch_size,
+    flush_interval=settings.audit_flush_interval_seconds,
+    max_pending=settings.audit_buffer_max_entries,
+    dead_letter=DeadLetterFile(settings.audit_dead_letter_path),
+)
+
+
+def _buffered() -> bool:
+    return settings.audit_mode == AUDIT_MODE_BUFFERED and audit_writer.running
 
 
 def log_audit(
@@ -12,15 +151,60 @@ def log_audit(
     action: str,
     patient_id: Optional[str] = None,
     details: Optional[Dict[str, Any]] = None,
-) -> models.AuditLog:
+) -> Optional[models.AuditLog]:
+    """Record one audit entry; returns the stored row, or ``None`` when it was buffered."""
     entry = models.AuditLog(
         actor=actor,
         role=role,
         action=action,
         patient_id=patient_id,
         details=details or {},
+        timestamp=datetime.utcnow(),
     )
+    if _buffered():
+        audit_writer.write(
+            [
+                {
+                    "actor": entry.actor,
+                    "role": entry.role,
+                    "action": entry.action,
+                    "patient_id": entry.patient_id,
+                    "details": entry.details,
+                    "timestamp": entry.timestamp,
+                }
+            ]
+        )
+        return None
     db.add(entry)
     db.commit()
     db.refresh(entry)
     return entry
+
+
+def log_audit_batch(
+    db: Session,
+    actor: str,
+    role: str,
+    action: str,
+    patient_ids: List[str],
+    details: Optional[Dict[str, Any]] = None,
+) -> None:
+    if not patient_ids:
+        return
+    timestamp = datetime.utcnow()
+    rows = [
+        {
+            "actor": actor,
+            "role": role,
+            "action": action,
+            "patient_id": patient_id,
+            "details": details or {},
+            "timestamp": timestamp,
+        }
+        for patient_id in patient_ids
+    ]
+    if _buffered():
+        audit_writer.write(rows)
+        return
+    db.execute(insert(models.AuditLog), rows)
+    db.commit()
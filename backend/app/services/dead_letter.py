@@ -0,0 +1,18 @@
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict
+
+
+class DeadLetterFile:
+    """Appends records that could not be persisted to an NDJSON file for inspection or replay."""
+
+    def __init__(self, path: str) -> None:
+        self._path = Path(path)
+        self._lock = threading.Lock()
+
+    def write(self, record: Dict[str, Any], error: str) -> None:
+        line = {"failed_at": datetime.utcnow().isoformat(), "error": error, **record}
+        with self._lock, self._path.open("a") as handle:
+            handle.write(json.dumps(line, separators=(",", ":"), default=datetime.isoformat) + "\n")
@@ -1,4 +1,10 @@
+from app.core.config import get_settings
 from app.services.websocket_manager import ConnectionManager
 
 
-connection_manager = ConnectionManager()
+settings = get_settings()
+
+connection_manager = ConnectionManager(
+    queue_size=settings.ws_send_queue_size,
+    slow_consumer_policy=settings.ws_slow_consumer_policy,
+)
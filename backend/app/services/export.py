@@ -0,0 +1,104 @@
+import csv
+import io
+import json
+from typing import Dict, Iterable, Iterator, Optional, Sequence
+
+from sqlalchemy import Select, select
+
+from app.core.config import get_settings
+from app.db import models
+from app.db.session import SessionLocal
+from app.services.fhir_mapper import BUNDLE_SEARCHSET, chunked, iter_observation_bundle
+
+
+EXPORT_COLUMNS = (
+    "patient_id",
+    "timestamp",
+    "metric",
+    "value",
+    "unit",
+    "normal_low",
+    "normal_high",
+    "status",
+    "source",
+)
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "fhir": "application/fhir+json",
+}
+
+
+def export_statement(
+    patient_id: Optional[str] = None,
+    metric: Optional[str] = None,
+    start=None,
+    end=None,
+    limit: Optional[int] = None,
+) -> Select:
+    statement = select(*(getattr(models.VitalSign, column) for column in EXPORT_COLUMNS))
+    if patient_id:
+        statement = statement.where(models.VitalSign.patient_id == patient_id)
+    if metric:
+        statement = statement.where(models.VitalSign.metric == metric)
+    if start:
+        statement = statement.where(models.VitalSign.timestamp >= start)
+    if end:
+        statement = statement.where(models.VitalSign.timestamp <= end)
+    statement = statement.order_by(models.VitalSign.patient_id, models.VitalSign.timestamp)
+    if limit is not None:
+        statement = statement.limit(limit)
+    return statement
+
+
+def stream_rows(statement: Select) -> Iterator[Sequence]:
+    """Yield result rows through a server-side cursor, ``export_chunk_size`` at a time.
+
+    The generator owns its session because it outlives the request's
+    dependency-scoped one.
+    """
+    db = SessionLocal()
+    try:
+        result = db.execute(statement.execution_options(yield_per=get_settings().export_chunk_size))
+        for partition in result.partitions():
+            yield from partition
+    finally:
+        db.close()
+
+
+def _row_dict(row: Sequence) -> Dict:
+    record = dict(zip(EXPORT_COLUMNS, row))
+    record["timestamp"] = record["timestamp"].isoformat()
+    return record
+
+
+def iter_ndjson(rows: Iterable[Sequence]) -> Iterator[str]:
+    for chunk in chunked(rows, get_settings().export_chunk_size):
+        yield "".join(json.dumps(_row_dict(row), separators=(",", ":")) + "\n" for row in chunk)
+
+
+def iter_csv(rows: Iterable[Sequence]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for chunk in chunked(rows, get_settings().export_chunk_size):
+        for row in chunk:
+            record = _row_dict(row)
+            writer.writerow([record[column] for column in EXPORT_COLUMNS])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def iter_fhir_bundle(rows: Iterable[Sequence]) -> Iterator[bytes]:
+    return iter_observation_bundle(rows, BUNDLE_SEARCHSET, chunk_size=get_settings().export_chunk_size)
+
+
+EXPORT_WRITERS = {
+    "ndjson": iter_ndjson,
+    "csv": iter_csv,
+    "fhir": iter_fhir_bundle,
+}
@@ -1,5 +1,7 @@
+import json
 from datetime import datetime
-from typing import Dict
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
 
 
 FHIR_CODES = {
@@ -26,3 +28,94 @@ def to_fhir_observation(patient_id: str, metric: str, value: float, unit: str, t
         "effectiveDateTime": timestamp.isoformat(),
         "valueQuantity": {"value": value, "unit": unit},
     }
+
+
+BUNDLE_SEARCHSET = "searchset"
+BUNDLE_TRANSACTION = "transaction"
+
+_TRANSACTION_REQUEST = ',"request":{"method":"POST","url":"Observation"}'
+
+
+class ObservationTemplates:
+    """Pre-serialized JSON fragments for Observation entries.
+
+    Everything that only depends on the metric and unit is encoded once per
+    (metric, unit) pair, and the subject reference once per patient, so that
+    serializing a row is a handful of string concatenations. The output is
+    equivalent to ``json.dumps({"resource": to_fhir_observation(...)})``.
+    """
+
+    def __init__(self, bundle_type: str = BUNDLE_SEARCHSET) -> None:
+        self._entry_suffix = ("}" + _TRANSACTION_REQUEST if bundle_type == BUNDLE_TRANSACTION else "}") + "}"
+        self._heads: Dict[Tuple[str, str], Tuple[str, str]] = {}
+        self._subjects: Dict[str, str] = {}
+
+    def _head(self, metric: str, unit: str) -> Tuple[str, str]:
+        key = (metric, unit)
+        head = self._heads.get(key)
+        if head is None:
+            code = json.dumps(
+                {"coding": [{"system": "http://loinc.org", "code": FHIR_CODES.get(metric, "custom")}], "text": metric},
+                separators=(",", ":"),
+            )
+            head = (
+                '{"resource":{"resourceType":"Observation","status":"final","code":' + code + ',"subject":',
+                ',"unit":' + json.dumps(unit) + "}" + self._entry_suffix,
+            )
+            self._heads[key] = head
+        return head
+
+    def _subject(self, patient_id: str) -> str:
+        subject = self._subjects.get(patient_id)
+        if subject is None:
+            subject = '{"reference":' + json.dumps(f"Patient/{patient_id}") + '},"effectiveDateTime":"'
+            self._subjects[patient_id] = subject
+        return subject
+
+    def entries(
+        self,
+        patient_ids: Sequence[str],
+        metrics: Sequence[str],
+        values: Sequence[float],
+        units: Sequence[str],
+        timestamps: Sequence[datetime],
+    ) -> List[str]:
+        """Serialize columnar vitals into Bundle entry strings."""
+        head = self._head
+        subject = self._subject
+        return [
+            prefix + subject(patient_id) + timestamp.isoformat() + '","valueQuantity":{"value":' + repr(float(value)) + suffix
+            for patient_id, (prefix, suffix), value, timestamp in zip(
+                patient_ids, map(head, metrics, units), values, timestamps
+            )
+        ]
+
+
+def iter_observation_bundle(
+    rows: Iterable[Sequence],
+    bundle_type: str = BUNDLE_SEARCHSET,
+    chunk_size: int = 1000,
+) -> Iterator[bytes]:
+    """Stream a serialized Observation ``Bundle`` from ``(patient_id, timestamp, metric, value, unit, ...)`` rows.
+
+    Rows are consumed ``chunk_size`` at a time and each chunk is written as
+    one bytes fragment, so memory stays bounded by the chunk.
+    """
+    templates = ObservationTemplates(bundle_type)
+    yield ('{"resourceType":"Bundle","type":' + json.dumps(bundle_type) + ',"entry":[').encode()
+    separator = ""
+    for chunk in chunked(rows, chunk_size):
+        patient_ids, timestamps, metrics, values, units = list(zip(*chunk))[:5]
+        yield (separator + ",".join(templates.entries(patient_ids, metrics, values, units, timestamps))).encode()
+        separator = ","
+    yield b"]}"
+
+
+def chunked(rows: Iterable[Sequence], size: int) -> Iterator[List[Sequence]]:
+    """Group ``rows`` into lists of ``size`` (the last may be shorter)."""
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
@@ -0,0 +1,184 @@
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Dict, Iterable, List, Set, Tuple, Union
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.db.session import on_commit, on_rollback
+from app.schemas.alert import AlertOut
+from app.schemas.vital import VitalIngest, VitalMeasurement
+from app.services.analytics import analytics_cache
+from app.services.events import connection_manager
+from app.services.rollups import upsert_latest, upsert_rollups
+from app.services.rules_engine import (
+    correlation_state,
+    derive_status,
+    evaluate_correlation,
+    evaluate_measurement,
+    restore_rule_state,
+)
+
+
+@dataclass
+class PatientIngest:
+    patient_id: str
+    vital_rows: List[Dict] = field(default_factory=list)
+    alerts: List[models.Alert] = field(default_factory=list)
+    messages: List[Dict] = field(default_factory=list)
+
+    @property
+    def ingested(self) -> int:
+        return len(self.vital_rows)
+
+    @property
+    def alerts_generated(self) -> int:
+        return len(self.alerts)
+
+
+def alert_message(alert: Union[models.Alert, AlertOut]) -> Dict:
+    return {
+        "type": "alert",
+        "payload": {
+            "id": alert.id,
+            "patient_id": alert.patient_id,
+            "severity": alert.severity,
+            "metric": alert.metric,
+            "timestamp": alert.timestamp.isoformat(),
+            "acknowledged": alert.acknowledged,
+        },
+    }
+
+
+def restore_rule_state_on_rollback(db: Session, patient_ids: Iterable[str]) -> None:
+    """Reload rule engine state for ``patient_ids`` if the current transaction does not commit.
+
+    Call it before ``evaluate_ingest``: evaluation updates escalation and
+    correlation state as it goes, so a failure part-way through must undo it.
+    """
+    on_rollback(db, partial(restore_rule_state, set(patient_ids)))
+
+
+def evaluate_ingest(db: Session, patient_id: str, measurements: List[VitalMeasurement]) -> PatientIngest:
+    result = PatientIngest(patient_id=patient_id)
+    for measurement in measurements:
+        status = measurement.status or derive_status(measurement.value, measurement.normal_low, measurement.normal_high)
+        alerts = evaluate_measurement(db, patient_id, measurement.metric, measurement.value, measurement.timestamp)
+        result.alerts.extend(alerts)
+        if alerts:
+            if any(alert.severity == "critical" for alert in alerts):
+                status = "critical"
+            elif any(alert.severity == "warning" for alert in alerts):
+                status = "warning"
+        result.vital_rows.append(
+            {
+                "patient_id": patient_id,
+                "timestamp": measurement.timestamp,
+                "metric": measurement.metric,
+                "value": measurement.value,
+                "unit": measurement.unit,
+                "normal_low": measurement.normal_low,
+                "normal_high": measurement.normal_high,
+                "status": status,
+                "source": measurement.source,
+            }
+        )
+        correlation_state.observe(patient_id, measurement.metric, measurement.value, measurement.timestamp)
+        result.messages.append(
+            {
+                "type": "vital",
+                "payload": {
+                    "patient_id": patient_id,
+                    "metric": measurement.metric,
+                    "value": measurement.value,
+                    "unit": measurement.unit,
+                    "timestamp": measurement.timestamp.isoformat(),
+                    "status": status,
+                },
+            }
+        )
+
+    if measurements:
+        latest = max(measurement.timestamp for measurement in measurements)
+        correlation_alert = evaluate_correlation(patient_id, latest)
+        if correlation_alert:
+            result.alerts.append(correlation_alert)
+    return result
+
+
+def persist_ingest(db: Session, results: Iterable[PatientIngest]) -> None:
+    """Write vitals and alerts for all results with one bulk insert per table.
+
+    The caller owns the transaction and commits once afterwards. Cached
+    analytics are invalidated only once it commits.
+    """
+    vital_rows: List[Dict] = []
+    alert_rows: List[Dict] = []
+    for result in results:
+        vital_rows.extend(result.vital_rows)
+        alert_rows.extend(
+            {
+                "id": alert.id,
+                "patient_id": alert.patient_id,
+                "metric": alert.metric,
+                "severity": alert.severity,
+                "trigger_rule": alert.trigger_rule,
+                "timestamp": alert.timestamp,
+                "acknowledged": alert.acknowledged,
+            }
+            for alert in result.alerts
+        )
+    if vital_rows:
+        db.execute(insert(models.VitalSign), vital_rows)
+        upsert_rollups(db, vital_rows)
+        upsert_latest(db, vital_rows)
+    if alert_rows:
+        db.execute(insert(models.Alert), alert_rows)
+    patient_ids = {row["patient_id"] for row in vital_rows} | {row["patient_id"] for row in alert_rows}
+    on_commit(db, partial(analytics_cache.invalidate, patient_ids))
+
+
+def known_patient_ids(db: Session, patient_ids: Iterable[str]) -> Set[str]:
+    """Return the subset of ``patient_ids`` that exist, with a single query."""
+    return {
+        patient_id
+        for (patient_id,) in db.query(models.Patient.id).filter(models.Patient.id.in_(set(patient_ids))).all()
+    }
+
+
+def ingest_items(db: Session, items: List[VitalIngest]) -> Tuple[List[PatientIngest], List[Dict]]:
+    """Evaluate and persist payloads for many patients; the caller commits.
+
+    Patient ids are validated with a single query and unknown patients are
+    reported per item instead of failing the whole batch.
+    """
+    known = known_patient_ids(db, (item.patient_id for item in items))
+    restore_rule_state_on_rollback(db, known)
+
+    results: List[PatientIngest] = []
+    response_items: List[Dict] = []
+    for item in items:
+        if item.patient_id not in known:
+            response_items.append(
+                {"patient_id": item.patient_id, "ingested": 0, "alerts_generated": 0, "error": "Patient not found"}
+            )
+            continue
+        result = evaluate_ingest(db, item.patient_id, item.measurements)
+        results.append(result)
+        response_items.append(
+            {"patient_id": item.patient_id, "ingested": result.ingested, "alerts_generated": result.alerts_generated}
+        )
+    persist_ingest(db, results)
+    return results, response_items
+
+
+async def broadcast_results(results: Iterable[PatientIngest]) -> None:
+    results = list(results)
+    messages: List[Dict] = []
+    for result in results:
+        messages.extend(result.messages)
+    for result in results:
+        messages.extend(alert_message(alert) for alert in result.alerts)
+    if messages:
+        await connection_manager.broadcast_many(messages)
@@ -0,0 +1,178 @@
+import asyncio
+import json
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.session import SessionLocal
+from app.schemas.vital import VitalIngest
+from app.services.audit import log_audit_batch
+from app.services.dead_letter import DeadLetterFile
+from app.services.ingest import PatientIngest, broadcast_results, ingest_items
+
+
+logger = logging.getLogger(__name__)
+
+
+class IngestQueueFull(Exception):
+    pass
+
+
+@dataclass
+class QueuedIngest:
+    actor: str
+    role: str
+    items: List[VitalIngest]
+
+    @property
+    def size(self) -> int:
+        return sum(len(item.measurements) for item in self.items)
+
+    def record(self) -> Dict:
+        return {"actor": self.actor, "role": self.role, "items": [json.loads(item.json()) for item in self.items]}
+
+
+class IngestQueue:
+    """Bounded write-behind queue drained by background persistence workers.
+
+    Requests are accepted as soon as they are validated. Workers group queued
+    requests into micro-batches, flushed when ``batch_size`` measurements have
+    accumulated or ``flush_interval`` seconds have passed, and persist each
+    micro-batch with a single commit. When that commit fails every request is
+    retried in its own transaction, and requests that still fail, or whose
+    patient disappeared since they were accepted, go to ``dead_letter``.
+    """
+
+    def __init__(
+        self, maxsize: int, workers: int, batch_size: int, flush_interval: float, dead_letter: DeadLetterFile
+    ) -> None:
+        self._dead_letter = dead_letter
+        self._maxsize = maxsize
+        self._workers = workers
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self) -> None:
+        if self._queue is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self._maxsize)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self._workers)]
+
+    async def stop(self) -> None:
+        if self._queue is None:
+            return
+        await self._queue.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    def submit(self, actor: str, role: str, items: List[VitalIngest]) -> int:
+        if self._queue is None:
+            raise IngestQueueFull("Ingest queue is not running")
+        queued = QueuedIngest(actor=actor, role=role, items=items)
+        try:
+            self._queue.put_nowait(queued)
+        except asyncio.QueueFull as exc:
+            raise IngestQueueFull("Ingest queue is full") from exc
+        return queued.size
+
+    async def _next_batch(self) -> List[QueuedIngest]:
+        loop = asyncio.get_running_loop()
+        first = await self._queue.get()
+        batch = [first]
+        size = first.size
+        deadline = loop.time() + self._flush_interval
+        while size < self._batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                queued = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            batch.append(queued)
+            size += queued.size
+        return batch
+
+    async def _worker(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                results = await run_in_threadpool(self._persist_batch, batch)
+                await broadcast_results(results)
+            except Exception:
+                logger.exception("Failed to broadcast %d queued ingest requests", len(batch))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _persist_batch(self, batch: List[QueuedIngest]) -> List[PatientIngest]:
+        try:
+            return self._persist(batch)
+        except Exception:
+            logger.exception("Failed to persist %d queued ingest requests; retrying one at a time", len(batch))
+        results: List[PatientIngest] = []
+        for queued in batch:
+            try:
+                results.extend(self._persist([queued]))
+            except Exception as exc:
+                logger.exception("Failed to persist queued vitals from %s; dead-lettered", queued.actor)
+                self._dead_letter.write(queued.record(), repr(exc))
+        return results
+
+    def _persist(self, batch: List[QueuedIngest]) -> List[PatientIngest]:
+        db = SessionLocal()
+        try:
+            items = [item for queued in batch for item in queued.items]
+            try:
+                results, response_items = ingest_items(db, items)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            # Everything below runs after the commit, so a failure here must not trigger a retry.
+            try:
+                self._finish(db, batch, response_items)
+            except Exception:
+                logger.exception("Failed to audit %d persisted ingest requests", len(batch))
+            return results
+        finally:
+            db.close()
+
+    def _finish(self, db: Session, batch: List[QueuedIngest], response_items: List[dict]) -> None:
+        responses = iter(response_items)
+        for queued in batch:
+            patient_ids = []
+            for item in queued.items:
+                response_item = next(responses)
+                if "error" in response_item:
+                    logger.warning("Dead-lettered queued vitals for %s: %s", item.patient_id, response_item["error"])
+                    self._dead_letter.write(
+                        QueuedIngest(actor=queued.actor, role=queued.role, items=[item]).record(), response_item["error"]
+                    )
+                else:
+                    patient_ids.append(item.patient_id)
+            log_audit_batch(db, actor=queued.actor, role=queued.role, action="vitals.ingest", patient_ids=patient_ids)
+
+
+settings = get_settings()
+
+ingest_queue = IngestQueue(
+    maxsize=settings.ingest_queue_maxsize,
+    workers=settings.ingest_queue_workers,
+    batch_size=settings.ingest_flush_batch_size,
+    flush_interval=settings.ingest_flush_interval_seconds,
+    dead_letter=DeadLetterFile(settings.ingest_dead_letter_path),
+)
@@ -0,0 +1,151 @@
+import logging
+import re
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "vital_signs"
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+PARTITION_PATTERN = re.compile(r"^vital_signs_p(\d{8})$")
+UPPER_BOUND_PATTERN = re.compile(r"TO \('([^']+)'\)")
+# pg_advisory_xact_lock key serializing partition DDL across workers and processes.
+PARTITION_LOCK_KEY = 0x76697461
+
+
+def partition_bounds(day: date, interval: str) -> Tuple[date, date]:
+    """Return the [start, end) range of the partition that contains ``day``.
+
+    Weekly partitions start on Mondays.
+    """
+    if interval == "week":
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=7)
+    return day, day + timedelta(days=1)
+
+
+def partition_name(start: date) -> str:
+    return f"{PARENT_TABLE}_p{start:%Y%m%d}"
+
+
+def is_partitioned(db: Session) -> bool:
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    return bool(
+        db.execute(
+            text(
+                "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+                "WHERE c.relname = :table"
+            ),
+            {"table": PARENT_TABLE},
+        ).scalar()
+    )
+
+
+def _table_exists(db: Session, name: str) -> bool:
+    return db.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None
+
+
+def _lock_partitions(db: Session) -> None:
+    """Hold the partition maintenance lock until the current transaction ends."""
+    db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": PARTITION_LOCK_KEY})
+
+
+def ensure_default_partition(db: Session) -> None:
+    """Catch rows outside every range partition, e.g. late uploads or backfilled history."""
+    db.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT"))
+
+
+def _create_partition(db: Session, name: str, lower: date, upper: date) -> None:
+    bounds = f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+    params = {"lower": lower, "upper": upper}
+    has_rows = db.execute(
+        text(f"SELECT 1 FROM {DEFAULT_PARTITION} WHERE timestamp >= :lower AND timestamp < :upper LIMIT 1"), params
+    ).scalar()
+    if not has_rows:
+        db.execute(text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} {bounds}"))
+        return
+    # Postgres refuses a new range while the default partition holds rows in it,
+    # so move them into a detached table first and attach that.
+    db.execute(text(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    db.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE timestamp >= :lower AND timestamp < :upper "
+            f"RETURNING *) INSERT INTO {name} SELECT * FROM moved"
+        ),
+        params,
+    )
+    db.execute(text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} {bounds}"))
+
+
+def ensure_partitions(db: Session, start: datetime, end: datetime, interval: str) -> List[str]:
+    """Create every partition needed to hold rows timestamped in [start, end], plus the default partition.
+
+    Rows already in the default partition for a new range are moved into it.
+    Concurrent callers are serialized with an advisory lock.
+    """
+    if not is_partitioned(db):
+        return []
+    _lock_partitions(db)
+    ensure_default_partition(db)
+    created = []
+    day = start.date()
+    while day <= end.date():
+        lower, upper = partition_bounds(day, interval)
+        name = partition_name(lower)
+        if not _table_exists(db, name):
+            _create_partition(db, name, lower, upper)
+        created.append(name)
+        day = upper
+    db.commit()
+    return created
+
+
+def drop_expired_partitions(db: Session, retention_days: int, now: Optional[datetime] = None) -> List[str]:
+    """Drop partitions whose whole range is older than the retention window.
+
+    Bounds are read from the catalog, so partitions created under an earlier
+    ``VITALS_PARTITION_INTERVAL`` are handled too. Expired rows in the default partition are deleted.
+    """
+    if retention_days <= 0 or not is_partitioned(db):
+        return []
+    _lock_partitions(db)
+    cutoff = datetime.combine(((now or datetime.utcnow()) - timedelta(days=retention_days)).date(), datetime.min.time())
+    rows = db.execute(
+        text(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :table"
+        ),
+        {"table": PARENT_TABLE},
+    ).all()
+    dropped = []
+    for name, bound in rows:
+        match = UPPER_BOUND_PATTERN.search(bound or "")
+        if not PARTITION_PATTERN.match(name) or not match:
+            continue
+        if datetime.fromisoformat(match.group(1)) <= cutoff:
+            db.execute(text(f"DROP TABLE IF EXISTS {name}"))
+            dropped.append(name)
+    if _table_exists(db, DEFAULT_PARTITION):
+        db.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE timestamp < :cutoff"), {"cutoff": cutoff})
+    db.commit()
+    return dropped
+
+
+def maintain_partitions(db: Session, now: Optional[datetime] = None) -> None:
+    settings = get_settings()
+    now = now or datetime.utcnow()
+    interval = settings.vitals_partition_interval
+    step = timedelta(days=7 if interval == "week" else 1)
+    ensure_partitions(db, now - step, now + step * settings.vitals_partitions_ahead, interval)
+    dropped = drop_expired_partitions(db, settings.vitals_retention_days, now=now)
+    if dropped:
+        logger.info("Dropped expired vital_signs partitions: %s", ", ".join(dropped))
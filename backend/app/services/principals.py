@@ -0,0 +1,88 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+
+from app.core.config import get_settings
+from app.db import models
+from app.db.session import on_commit
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated caller, detached from any database session."""
+
+    username: str
+    role: str
+    full_name: Optional[str] = None
+    is_active: bool = True
+
+    @classmethod
+    def from_user(cls, user: models.User) -> "Principal":
+        return cls(
+            username=user.username,
+            role=user.role,
+            full_name=user.full_name,
+            is_active=bool(user.is_active),
+        )
+
+
+class PrincipalCache:
+    """LRU cache of resolved principals keyed by token subject, with a TTL.
+
+    Entries are dropped explicitly whenever a ``User`` row is updated or
+    deleted in this process; changes made elsewhere are picked up once the
+    entry expires.
+    """
+
+    def __init__(self, maxsize: int, ttl_seconds: float) -> None:
+        self._maxsize = maxsize
+        self._ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple[float, Principal]]" = OrderedDict()
+
+    def get(self, username: str) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None:
+                return None
+            expires_at, principal = entry
+            if expires_at < time.monotonic():
+                del self._entries[username]
+                return None
+            self._entries.move_to_end(username)
+            return principal
+
+    def put(self, principal: Principal) -> None:
+        if self._maxsize <= 0 or self._ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[principal.username] = (time.monotonic() + self._ttl_seconds, principal)
+            self._entries.move_to_end(principal.username)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, username: Optional[str] = None) -> None:
+        with self._lock:
+            if username is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(username, None)
+
+
+settings = get_settings()
+
+principal_cache = PrincipalCache(
+    maxsize=settings.principal_cache_size,
+    ttl_seconds=settings.principal_cache_ttl_seconds,
+)
+
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate_principal(mapper, connection, target) -> None:
+    on_commit(object_session(target), principal_cache.invalidate)
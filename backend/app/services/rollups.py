@@ -0,0 +1,142 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.services.running_stats import RunningStats
+
+
+RESOLUTIONS: Dict[str, timedelta] = {
+    "1m": timedelta(minutes=1),
+    "1h": timedelta(hours=1),
+}
+
+
+def bucket_start(timestamp: datetime, resolution: str) -> datetime:
+    if resolution == "1h":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(second=0, microsecond=0)
+
+
+def aggregate_rows(vital_rows: Iterable[Dict]) -> List[Dict]:
+    """Fold raw vital rows into one partial aggregate per rollup bucket."""
+    buckets: Dict[Tuple[str, str, str, datetime], RunningStats] = {}
+    totals: Dict[Tuple[str, str, str, datetime], float] = {}
+    for row in vital_rows:
+        value = row["value"]
+        for resolution in RESOLUTIONS:
+            key = (row["patient_id"], resolution, row["metric"], bucket_start(row["timestamp"], resolution))
+            stats = buckets.get(key)
+            if stats is None:
+                stats = buckets[key] = RunningStats()
+                totals[key] = 0.0
+            stats.add(value)
+            totals[key] += value
+    # A stable key order keeps concurrent upserts from deadlocking on row locks.
+    return [
+        {
+            "patient_id": key[0],
+            "resolution": key[1],
+            "metric": key[2],
+            "bucket_start": key[3],
+            "count": buckets[key].count,
+            "sum": totals[key],
+            "m2": buckets[key].m2,
+            "min": buckets[key].min,
+            "max": buckets[key].max,
+        }
+        for key in sorted(buckets)
+    ]
+
+
+def upsert_rollups(db: Session, vital_rows: Iterable[Dict]) -> None:
+    """Merge raw rows into the 1-minute and 1-hour rollups; the caller commits.
+
+    ``m2`` (sum of squared deviations) is merged alongside count and sum so
+    that variance can be read from any bucket or combination of buckets.
+    """
+    rows = aggregate_rows(vital_rows)
+    if not rows:
+        return
+    table = models.VitalRollup.__table__
+    statement = insert(table)
+    excluded = statement.excluded
+    # Chan et al.: M2 = M2a + M2b + delta^2 * na * nb / (na + nb), delta = mean_b - mean_a.
+    delta = excluded.sum / excluded.count - table.c.sum / table.c.count
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[table.c.patient_id, table.c.resolution, table.c.metric, table.c.bucket_start],
+            set_={
+                "count": table.c.count + excluded.count,
+                "sum": table.c.sum + excluded.sum,
+                "m2": table.c.m2
+                + excluded.m2
+                + delta * delta * table.c.count * excluded.count / (table.c.count + excluded.count),
+                "min": func.least(table.c.min, excluded.min),
+                "max": func.greatest(table.c.max, excluded.max),
+            },
+        ),
+        rows,
+    )
+
+
+def latest_rows(vital_rows: Iterable[Dict]) -> List[Dict]:
+    """The newest raw row per (patient, metric), as ``vital_latest`` rows."""
+    latest: Dict[Tuple[str, str], Dict] = {}
+    for row in vital_rows:
+        key = (row["patient_id"], row["metric"])
+        current = latest.get(key)
+        if current is None or row["timestamp"] >= current["timestamp"]:
+            latest[key] = row
+    return [
+        {"patient_id": key[0], "metric": key[1], "value": latest[key]["value"], "timestamp": latest[key]["timestamp"]}
+        for key in sorted(latest)
+    ]
+
+
+def upsert_latest(db: Session, vital_rows: Iterable[Dict]) -> None:
+    """Move ``vital_latest`` forward to the newest of ``vital_rows``; the caller commits.
+
+    Late readings older than the stored one leave it unchanged.
+    """
+    rows = latest_rows(vital_rows)
+    if not rows:
+        return
+    table = models.VitalLatest.__table__
+    statement = insert(table)
+    excluded = statement.excluded
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[table.c.patient_id, table.c.metric],
+            set_={"value": excluded.value, "timestamp": excluded.timestamp},
+            where=excluded.timestamp >= table.c.timestamp,
+        ),
+        rows,
+    )
+
+
+def seed_latest(db: Session, since: datetime) -> None:
+    """Fill an empty ``vital_latest`` from readings taken since ``since``.
+
+    Databases created before the table existed only need this once; it is a
+    no-op as soon as any row is present.
+    """
+    if db.query(models.VitalLatest.patient_id).first() is not None:
+        return
+    vitals = models.VitalSign
+    newest = (
+        db.query(vitals.patient_id, vitals.metric, vitals.value, vitals.timestamp)
+        .filter(vitals.timestamp >= since)
+        .distinct(vitals.patient_id, vitals.metric)
+        .order_by(vitals.patient_id, vitals.metric, vitals.timestamp.desc())
+    )
+    table = models.VitalLatest.__table__
+    db.execute(
+        insert(table)
+        .from_select(["patient_id", "metric", "value", "timestamp"], newest)
+        .on_conflict_do_nothing(index_elements=[table.c.patient_id, table.c.metric])
+    )
+    db.commit()
@@ -1,9 +1,18 @@
+import bisect
+import operator
+import threading
+import time
+import uuid
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import List, Optional, Tuple
+from typing import Callable, Collection, Dict, List, Optional, Tuple
 
-from sqlalchemy.orm import Session
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
 
+from app.core.config import get_settings
 from app.db import models
+from app.db.session import SessionLocal, on_commit
 
 
 DEFAULT_RULES = [
@@ -23,18 +32,217 @@ DEFAULT_RULES = [
 ]
 
 
-def _compare(value: float, operator: str, threshold: float) -> bool:
-    if operator == ">":
-        return value > threshold
-    if operator == "<":
-        return value < threshold
-    if operator == ">=":
-        return value >= threshold
-    if operator == "<=":
-        return value <= threshold
+ESCALATION_WINDOW = timedelta(minutes=30)
+ESCALATION_THRESHOLD = 2
+# How far behind the newest warning a reading may be and still see every warning in its window.
+ESCALATION_MAX_LATENESS = timedelta(minutes=30)
+CORRELATION_WINDOW = timedelta(minutes=10)
+CORRELATION_HEART_RATE_ABOVE = 120
+CORRELATION_SPO2_BELOW = 90
+CORRELATION_RULE = "Tachycardia + Hypoxemia Correlation"
+
+OPERATORS: Dict[str, Callable[[float, float], bool]] = {
+    ">": operator.gt,
+    "<": operator.lt,
+    ">=": operator.ge,
+    "<=": operator.le,
+}
+
+
+def _never(value: float, threshold: float) -> bool:
     return False
 
 
+@dataclass(frozen=True)
+class CompiledRule:
+    name: str
+    metric: str
+    threshold: float
+    severity: str
+    comparator: Callable[[float, float], bool]
+
+    def matches(self, value: float) -> bool:
+        return self.comparator(value, self.threshold)
+
+
+class RuleIndex:
+    """Process-wide compiled rule set, grouped by metric.
+
+    The index is rebuilt lazily whenever the version stamp moves, which happens
+    on any flush that inserts, updates or deletes a ``RuleDefinition`` row in
+    this process. Edits made by other processes are picked up once the index is
+    older than ``rule_index_ttl_seconds``.
+    """
+
+    def __init__(self, ttl_seconds: float) -> None:
+        self._lock = threading.RLock()
+        self._ttl_seconds = ttl_seconds
+        self._version = 0
+        self._loaded_version = -1
+        self._loaded_at = 0.0
+        self._by_metric: Dict[str, Tuple[CompiledRule, ...]] = {}
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._version += 1
+
+    def rules_for(self, db: Session, metric: str) -> Tuple[CompiledRule, ...]:
+        stale = self._ttl_seconds > 0 and time.monotonic() - self._loaded_at > self._ttl_seconds
+        if stale or self._loaded_version != self._version:
+            self._reload(db)
+        return self._by_metric.get(metric, ())
+
+    def _reload(self, db: Session) -> None:
+        with self._lock:
+            version = self._version
+            by_metric: Dict[str, List[CompiledRule]] = {}
+            for rule in load_rules(db):
+                by_metric.setdefault(rule.metric, []).append(
+                    CompiledRule(
+                        name=rule.name,
+                        metric=rule.metric,
+                        threshold=rule.threshold,
+                        severity=rule.severity,
+                        comparator=OPERATORS.get(rule.operator, _never),
+                    )
+                )
+            self._by_metric = {metric: tuple(rules) for metric, rules in by_metric.items()}
+            self._loaded_version = version
+            self._loaded_at = time.monotonic()
+
+
+rule_index = RuleIndex(ttl_seconds=get_settings().rule_index_ttl_seconds)
+
+
+@event.listens_for(models.RuleDefinition, "after_insert")
+@event.listens_for(models.RuleDefinition, "after_update")
+@event.listens_for(models.RuleDefinition, "after_delete")
+def _invalidate_rule_index(mapper, connection, target) -> None:
+    # Flush happens before commit; invalidating here would let another request
+    # reload the old rules (or keep them after a rollback) until the TTL expires.
+    on_commit(object_session(target), rule_index.invalidate)
+
+
+class EscalationTracker:
+    """Sliding-window counts of warning alerts per (patient, metric).
+
+    Each key holds a sorted list of warning timestamps. ``count`` returns every
+    warning at or after ``timestamp - window``, like the ``COUNT`` query it
+    replaces, so a late reading is escalated by warnings recorded after it.
+    Warnings are kept for ``max_lateness`` beyond the window, measured from the
+    newest one, so readings up to that late are counted exactly. Warnings are
+    recorded as soon as they are raised, which makes escalation see alerts from
+    the same request before they are flushed.
+    """
+
+    def __init__(self, window: timedelta = ESCALATION_WINDOW, max_lateness: timedelta = ESCALATION_MAX_LATENESS) -> None:
+        self._window = window
+        self._retention = window + max_lateness
+        self._lock = threading.Lock()
+        self._warnings: Dict[Tuple[str, str], List[datetime]] = {}
+
+    def record(self, patient_id: str, metric: str, timestamp: datetime) -> None:
+        with self._lock:
+            timestamps = self._warnings.setdefault((patient_id, metric), [])
+            bisect.insort(timestamps, timestamp)
+            expired = bisect.bisect_left(timestamps, timestamps[-1] - self._retention)
+            if expired:
+                del timestamps[:expired]
+
+    def count(self, patient_id: str, metric: str, timestamp: datetime) -> int:
+        with self._lock:
+            timestamps = self._warnings.get((patient_id, metric))
+            if not timestamps:
+                return 0
+            return len(timestamps) - bisect.bisect_left(timestamps, timestamp - self._window)
+
+    def rebuild(self, db: Session, now: Optional[datetime] = None, patient_ids: Optional[Collection[str]] = None) -> None:
+        """Reload warnings from the database, for every patient or only ``patient_ids``."""
+        cutoff = (now or datetime.utcnow()) - self._retention
+        query = db.query(models.Alert.patient_id, models.Alert.metric, models.Alert.timestamp).filter(
+            models.Alert.severity == "warning", models.Alert.timestamp >= cutoff
+        )
+        if patient_ids is not None:
+            query = query.filter(models.Alert.patient_id.in_(patient_ids))
+        rows = query.order_by(models.Alert.timestamp).all()
+        with self._lock:
+            if patient_ids is None:
+                self._warnings = {}
+            else:
+                for key in [key for key in self._warnings if key[0] in patient_ids]:
+                    del self._warnings[key]
+        for patient_id, metric, timestamp in rows:
+            self.record(patient_id, metric, timestamp)
+
+
+escalation_tracker = EscalationTracker()
+
+
+class CorrelationState:
+    """Latest value and timestamp per metric for every patient.
+
+    Updated on ingest so multi-metric rules are checked without reading the
+    recent vitals back from the database.
+    """
+
+    def __init__(self, window: timedelta = CORRELATION_WINDOW) -> None:
+        self._window = window
+        self._lock = threading.Lock()
+        self._latest: Dict[str, Dict[str, Tuple[float, datetime]]] = {}
+
+    def observe(self, patient_id: str, metric: str, value: float, timestamp: datetime) -> None:
+        with self._lock:
+            metrics = self._latest.setdefault(patient_id, {})
+            current = metrics.get(metric)
+            if current is None or timestamp >= current[1]:
+                metrics[metric] = (value, timestamp)
+
+    def recent_values(self, patient_id: str, timestamp: datetime) -> Dict[str, float]:
+        window_start = timestamp - self._window
+        with self._lock:
+            metrics = self._latest.get(patient_id, {})
+            return {metric: value for metric, (value, observed_at) in metrics.items() if observed_at >= window_start}
+
+    def rebuild(self, db: Session, now: Optional[datetime] = None, patient_ids: Optional[Collection[str]] = None) -> None:
+        """Reload latest values from the database, for every patient or only ``patient_ids``."""
+        window_start = (now or datetime.utcnow()) - self._window
+        query = db.query(
+            models.VitalSign.patient_id, models.VitalSign.metric, models.VitalSign.value, models.VitalSign.timestamp
+        ).filter(models.VitalSign.timestamp >= window_start)
+        if patient_ids is not None:
+            query = query.filter(models.VitalSign.patient_id.in_(patient_ids))
+        rows = query.all()
+        with self._lock:
+            if patient_ids is None:
+                self._latest = {}
+            else:
+                for patient_id in patient_ids:
+                    self._latest.pop(patient_id, None)
+        for patient_id, metric, value, timestamp in rows:
+            self.observe(patient_id, metric, value, timestamp)
+
+
+correlation_state = CorrelationState()
+
+
+def restore_rule_state(patient_ids: Collection[str]) -> None:
+    """Reset escalation and correlation state for ``patient_ids`` to what is committed.
+
+    Evaluation updates that state before the ingest transaction commits; this
+    undoes it when the transaction does not.
+    """
+    db = SessionLocal()
+    try:
+        escalation_tracker.rebuild(db, patient_ids=patient_ids)
+        correlation_state.rebuild(db, patient_ids=patient_ids)
+    finally:
+        db.close()
+
+
 def load_rules(db: Session) -> List[models.RuleDefinition]:
     rules = db.query(models.RuleDefinition).filter(models.RuleDefinition.enabled.is_(True)).all()
     if rules:
@@ -53,26 +261,18 @@ def evaluate_measurement(
     timestamp: datetime,
 ) -> List[models.Alert]:
     alerts: List[models.Alert] = []
-    rules = [rule for rule in load_rules(db) if rule.metric == metric]
-    for rule in rules:
-        if _compare(value, rule.operator, rule.threshold):
+    for rule in rule_index.rules_for(db, metric):
+        if rule.matches(value):
             severity = rule.severity
             trigger_rule = rule.name
             if severity == "warning":
-                recent = (
-                    db.query(models.Alert)
-                    .filter(
-                        models.Alert.patient_id == patient_id,
-                        models.Alert.metric == metric,
-                        models.Alert.severity == "warning",
-                        models.Alert.timestamp >= timestamp - timedelta(minutes=30),
-                    )
-                    .count()
-                )
-                if recent >= 2:
+                if escalation_tracker.count(patient_id, metric, timestamp) >= ESCALATION_THRESHOLD:
                     severity = "critical"
                     trigger_rule = f"{rule.name} (escalated)"
+                else:
+                    escalation_tracker.record(patient_id, metric, timestamp)
             alert = models.Alert(
+                id=str(uuid.uuid4()),
                 patient_id=patient_id,
                 metric=metric,
                 severity=severity,
@@ -84,27 +284,15 @@ def evaluate_measurement(
     return alerts
 
 
-def evaluate_correlation(
-    db: Session,
-    patient_id: str,
-    timestamp: datetime,
-) -> Optional[models.Alert]:
-    window_start = timestamp - timedelta(minutes=10)
-    recent = (
-        db.query(models.VitalSign)
-        .filter(
-            models.VitalSign.patient_id == patient_id,
-            models.VitalSign.timestamp >= window_start,
-        )
-        .all()
-    )
-    metrics = {v.metric: v.value for v in recent}
-    if metrics.get("heart_rate", 0) > 120 and metrics.get("spo2", 100) < 90:
+def evaluate_correlation(patient_id: str, timestamp: datetime) -> Optional[models.Alert]:
+    metrics = correlation_state.recent_values(patient_id, timestamp)
+    if metrics.get("heart_rate", 0) > CORRELATION_HEART_RATE_ABOVE and metrics.get("spo2", 100) < CORRELATION_SPO2_BELOW:
         return models.Alert(
+            id=str(uuid.uuid4()),
             patient_id=patient_id,
             metric="multi_metric",
             severity="critical",
-            trigger_rule="Tachycardia + Hypoxemia Correlation",
+            trigger_rule=CORRELATION_RULE,
             timestamp=timestamp,
             acknowledged=False,
         )
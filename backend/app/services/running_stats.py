@@ -0,0 +1,57 @@
+import math
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+
+STATS_WINDOW = timedelta(hours=24)
+
+
+@dataclass
+class RunningStats:
+    """Count, mean, sum of squared deviations (``m2``), min and max of a stream.
+
+    Values are folded in with Welford's update and partial aggregates are
+    combined with Chan's parallel formula, so neither needs the raw values.
+    """
+
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    min: float = math.inf
+    max: float = -math.inf
+
+    @classmethod
+    def from_rollup(cls, count: int, total: float, m2: float, low: float, high: float) -> "RunningStats":
+        return cls(count=count, mean=total / count if count else 0.0, m2=m2, min=low, max=high)
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / self.count if self.count else 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: "RunningStats") -> None:
+        if not other.count:
+            return
+        if not self.count:
+            self.count, self.mean, self.m2, self.min, self.max = other.count, other.mean, other.m2, other.min, other.max
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+
+def window_start(now: Optional[datetime] = None, window: timedelta = STATS_WINDOW) -> datetime:
+    """Start of the oldest hourly bucket inside the window ending at ``now``."""
+    return ((now or datetime.utcnow()) - window).replace(minute=0, second=0, microsecond=0)
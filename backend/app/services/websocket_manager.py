@@ -1,20 +1,252 @@
-from typing import List
+import asyncio
+import json
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
 
 from fastapi import WebSocket
 
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+
+logger = logging.getLogger(__name__)
+
+DROP_OLDEST = "drop_oldest"
+DISCONNECT = "disconnect"
+
+ENCODING_JSON = "json"
+ENCODING_MSGPACK = "msgpack"
+
+Frame = Union[str, bytes]
+
+
+def supported_encodings() -> Tuple[str, ...]:
+    if msgpack is None:
+        return (ENCODING_JSON,)
+    return (ENCODING_JSON, ENCODING_MSGPACK)
+
+
+def encode_frame(messages: Sequence[dict], encoding: str) -> Frame:
+    """Serialize messages into one frame.
+
+    A single message is sent as-is; several are wrapped in a ``batch`` frame
+    whose payload is the list of messages.
+    """
+    frame = messages[0] if len(messages) == 1 else {"type": "batch", "payload": list(messages)}
+    if encoding == ENCODING_MSGPACK:
+        return msgpack.packb(frame, use_bin_type=True)
+    return json.dumps(frame, separators=(",", ":"))
+
+
+class ClientConnection:
+    def __init__(self, websocket: WebSocket, queue_size: int, encoding: str = ENCODING_JSON) -> None:
+        self.websocket = websocket
+        self.encoding = encoding
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.sender: Optional[asyncio.Task] = None
+        self.dropped = 0
+        self.patient_ids: Set[str] = set()
+        self.filtered = False
+        self.alerts_only = False
+        self.all_alerts = False
+
 
 class ConnectionManager:
-    def __init__(self) -> None:
-        self.active_connections: List[WebSocket] = []
+    """Fans messages out to websocket clients through per-client send queues.
+
+    ``broadcast`` only enqueues; a sender task per client drains its queue, so
+    a slow or dead dashboard never blocks the caller. When a client's queue is
+    full the ``slow_consumer_policy`` either drops its oldest pending message
+    or disconnects it.
+
+    Clients receive every message until their first patient subscription, even
+    one that names no patients. From then on they are filtered until ``reset``:
+    a subscription index routes each message only to the clients watching its
+    ``patient_id``; ``alerts_only`` clients are
+    skipped for anything that is not an alert, and ``all_alerts`` clients get
+    alerts for every patient on top of their patient subscriptions.
+
+    ``broadcast_many`` coalesces the messages of one operation into a single
+    frame per recipient. Frames are serialized once per distinct message
+    selection and encoding, then shared by every client that needs them.
+    """
 
-    async def connect(self, websocket: WebSocket) -> None:
+    def __init__(self, queue_size: int = 256, slow_consumer_policy: str = DROP_OLDEST) -> None:
+        if slow_consumer_policy not in (DROP_OLDEST, DISCONNECT):
+            raise ValueError(f"Unknown slow consumer policy: {slow_consumer_policy}")
+        self.queue_size = queue_size
+        self.slow_consumer_policy = slow_consumer_policy
+        self.active_connections: Dict[WebSocket, ClientConnection] = {}
+        self._unfiltered: Set[ClientConnection] = set()
+        self._by_patient: Dict[str, Set[ClientConnection]] = {}
+        self._all_alerts: Set[ClientConnection] = set()
+
+    async def connect(self, websocket: WebSocket, encoding: str = ENCODING_JSON) -> None:
         await websocket.accept()
-        self.active_connections.append(websocket)
+        client = ClientConnection(websocket, self.queue_size, encoding)
+        client.sender = asyncio.create_task(self._send_loop(client))
+        self.active_connections[websocket] = client
+        self._unfiltered.add(client)
 
     def disconnect(self, websocket: WebSocket) -> None:
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+        client = self.active_connections.pop(websocket, None)
+        if client is None:
+            return
+        self._unfiltered.discard(client)
+        self._all_alerts.discard(client)
+        self._unindex(client, client.patient_ids)
+        if client.sender is not None:
+            client.sender.cancel()
+
+    def subscribe(
+        self,
+        websocket: WebSocket,
+        patient_ids: Optional[Iterable[str]] = None,
+        alerts_only: Optional[bool] = None,
+        all_alerts: Optional[bool] = None,
+    ) -> None:
+        """Add patient subscriptions and update flags.
+
+        Passing ``patient_ids`` at all, empty included, switches the client to
+        filtered mode; ``None`` only updates the flags.
+        """
+        client = self.active_connections.get(websocket)
+        if client is None:
+            return
+        self._set_flags(client, alerts_only, all_alerts)
+        if patient_ids is None:
+            return
+        client.filtered = True
+        self._unfiltered.discard(client)
+        added = set(patient_ids) - client.patient_ids
+        client.patient_ids |= added
+        for patient_id in added:
+            self._by_patient.setdefault(patient_id, set()).add(client)
+
+    def unsubscribe(
+        self,
+        websocket: WebSocket,
+        patient_ids: Iterable[str],
+        alerts_only: Optional[bool] = None,
+        all_alerts: Optional[bool] = None,
+    ) -> None:
+        """Remove patient subscriptions; a filtered client stays filtered with none left."""
+        client = self.active_connections.get(websocket)
+        if client is None:
+            return
+        self._set_flags(client, alerts_only, all_alerts)
+        removed = client.patient_ids & set(patient_ids)
+        client.patient_ids -= removed
+        self._unindex(client, removed)
+
+    def reset(self, websocket: WebSocket) -> None:
+        """Drop every subscription and flag, returning the client to the unfiltered stream."""
+        client = self.active_connections.get(websocket)
+        if client is None:
+            return
+        self._unindex(client, client.patient_ids)
+        client.patient_ids = set()
+        client.filtered = False
+        self._set_flags(client, alerts_only=False, all_alerts=False)
+        self._unfiltered.add(client)
+
+    def subscriptions(self, websocket: WebSocket) -> Dict:
+        client = self.active_connections.get(websocket)
+        if client is None:
+            return {"patient_ids": [], "filtered": False, "alerts_only": False, "all_alerts": False}
+        return {
+            "patient_ids": sorted(client.patient_ids),
+            "filtered": client.filtered,
+            "alerts_only": client.alerts_only,
+            "all_alerts": client.all_alerts,
+        }
+
+    def _set_flags(self, client: ClientConnection, alerts_only: Optional[bool], all_alerts: Optional[bool]) -> None:
+        if alerts_only is not None:
+            client.alerts_only = bool(alerts_only)
+        if all_alerts is not None:
+            client.all_alerts = bool(all_alerts)
+            if client.all_alerts:
+                self._all_alerts.add(client)
+            else:
+                self._all_alerts.discard(client)
+
+    def _unindex(self, client: ClientConnection, patient_ids: Iterable[str]) -> None:
+        for patient_id in patient_ids:
+            watchers = self._by_patient.get(patient_id)
+            if watchers is None:
+                continue
+            watchers.discard(client)
+            if not watchers:
+                del self._by_patient[patient_id]
+
+    def _recipients(self, message: dict) -> List[ClientConnection]:
+        patient_id = (message.get("payload") or {}).get("patient_id")
+        recipients = set(self._unfiltered)
+        if patient_id is not None:
+            recipients |= self._by_patient.get(patient_id, set())
+        if message.get("type") != "alert":
+            return [client for client in recipients if not client.alerts_only]
+        return list(recipients | self._all_alerts)
 
     async def broadcast(self, message: dict) -> None:
-        for connection in self.active_connections:
-            await connection.send_json(message)
+        await self.broadcast_many([message])
+
+    async def broadcast_many(self, messages: Sequence[dict]) -> None:
+        selections: Dict[ClientConnection, List[int]] = {}
+        for index, message in enumerate(messages):
+            for client in self._recipients(message):
+                selections.setdefault(client, []).append(index)
+
+        groups: Dict[Tuple[int, ...], List[ClientConnection]] = {}
+        for client, indices in selections.items():
+            groups.setdefault(tuple(indices), []).append(client)
+
+        for indices, clients in groups.items():
+            selected = [messages[index] for index in indices]
+            frames: Dict[str, Frame] = {}
+            for client in clients:
+                if client.encoding not in frames:
+                    frames[client.encoding] = encode_frame(selected, client.encoding)
+                self._enqueue(client, frames[client.encoding])
+
+    async def send_personal(self, websocket: WebSocket, message: dict) -> None:
+        client = self.active_connections.get(websocket)
+        if client is not None:
+            self._enqueue(client, encode_frame([message], client.encoding))
+
+    def _enqueue(self, client: ClientConnection, frame: Frame) -> None:
+        try:
+            client.queue.put_nowait(frame)
+            return
+        except asyncio.QueueFull:
+            pass
+        if self.slow_consumer_policy == DISCONNECT:
+            logger.warning("Disconnecting slow websocket client after %d queued messages", client.queue.qsize())
+            self.disconnect(client.websocket)
+            asyncio.create_task(self._close(client.websocket))
+            return
+        client.queue.get_nowait()
+        client.queue.put_nowait(frame)
+        client.dropped += 1
+
+    async def _send_loop(self, client: ClientConnection) -> None:
+        try:
+            while True:
+                frame = await client.queue.get()
+                if isinstance(frame, bytes):
+                    await client.websocket.send_bytes(frame)
+                else:
+                    await client.websocket.send_text(frame)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.disconnect(client.websocket)
+
+    async def _close(self, websocket: WebSocket) -> None:
+        try:
+            await websocket.close(code=1013)
+        except Exception:
+            pass
@@ -0,0 +1,79 @@
+"""Compare per-row and batch FHIR Observation serialization throughput.
+
+Run from ``backend/``: ``python -m benchmarks.fhir_bundle --rows 200000``.
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from app.services.fhir_mapper import FHIR_CODES, iter_observation_bundle, to_fhir_observation
+
+
+UNITS = {
+    "heart_rate": "bpm",
+    "spo2": "%",
+    "bp_systolic": "mmHg",
+    "bp_diastolic": "mmHg",
+    "respiratory_rate": "breaths/min",
+    "temperature": "C",
+    "blood_glucose": "mg/dL",
+    "activity": "steps",
+}
+
+
+def build_rows(count: int, patients: int, seed: int) -> List[Tuple]:
+    rng = random.Random(seed)
+    metrics = list(FHIR_CODES)
+    start = datetime(2026, 1, 1)
+    return [
+        (
+            f"pat_{rng.randrange(patients):04d}",
+            start + timedelta(seconds=index),
+            metric,
+            round(rng.uniform(40, 160), 1),
+            UNITS[metric],
+        )
+        for index, metric in ((index, rng.choice(metrics)) for index in range(count))
+    ]
+
+
+def per_row(rows: List[Tuple]) -> Iterator[bytes]:
+    entries = [
+        {"resource": to_fhir_observation(patient_id, metric, value, unit, timestamp)}
+        for patient_id, timestamp, metric, value, unit in rows
+    ]
+    yield json.dumps({"resourceType": "Bundle", "type": "searchset", "entry": entries}).encode()
+
+
+def batch(rows: List[Tuple]) -> Iterator[bytes]:
+    return iter_observation_bundle(rows)
+
+
+def measure(serializer: Callable[[List[Tuple]], Iterator[bytes]], rows: List[Tuple], repeat: int) -> Dict:
+    best = float("inf")
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = sum(len(chunk) for chunk in serializer(rows))
+        best = min(best, time.perf_counter() - started)
+    return {"seconds": round(best, 4), "rows_per_second": round(len(rows) / best), "bytes": size}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="FHIR Bundle serialization benchmark")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--patients", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    rows = build_rows(args.rows, args.patients, args.seed)
+    results = {"rows": args.rows, "per_row": measure(per_row, rows, args.repeat), "batch": measure(batch, rows, args.repeat)}
+    results["speedup"] = round(results["per_row"]["seconds"] / results["batch"]["seconds"], 2)
+    print(json.dumps(results, indent=2))
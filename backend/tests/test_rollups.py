@@ -0,0 +1,32 @@
+from datetime import datetime
+
+from app.schemas.vital import VitalIngest
+from app.services.rollups import aggregate_rows
+
+
+def _measurement(timestamp: str, value: float) -> dict:
+    return {"timestamp": timestamp, "metric": "heart_rate", "value": value, "unit": "bpm", "source": "test"}
+
+
+def test_aggregate_rows_accepts_mixed_aware_and_naive_timestamps() -> None:
+    payload = VitalIngest(
+        patient_id="pat_001",
+        measurements=[
+            _measurement("2026-10-18T10:01:00Z", 70),
+            _measurement("2026-10-18T12:02:30+02:00", 80),
+            _measurement("2026-10-18T10:03:00", 90),
+        ],
+    )
+    rows = aggregate_rows(
+        {"patient_id": payload.patient_id, "metric": m.metric, "value": m.value, "timestamp": m.timestamp}
+        for m in payload.measurements
+    )
+
+    assert all(m.timestamp.tzinfo is None for m in payload.measurements)
+    hourly = [row for row in rows if row["resolution"] == "1h"]
+    assert len(hourly) == 1
+    assert hourly[0]["bucket_start"] == datetime(2026, 10, 18, 10)
+    assert hourly[0]["count"] == 3
+    assert hourly[0]["sum"] == 240
+    minutes = [row["bucket_start"] for row in rows if row["resolution"] == "1m"]
+    assert minutes == [datetime(2026, 10, 18, 10, 1), datetime(2026, 10, 18, 10, 2), datetime(2026, 10, 18, 10, 3)]
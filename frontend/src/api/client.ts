@@ -52,16 +52,34 @@ export const api = {
     request<AnalyticsSummary>(`/api/v1/analytics/summary?patient_id=${patientId}`),
 };
 
-export function createWebSocket(onMessage: (data: unknown) => void) {
+export type StreamSubscription = {
+  patient_ids?: string[];
+  clinician?: string;
+  alerts_only?: boolean;
+  all_alerts?: boolean;
+};
+
+export function createWebSocket(onMessage: (data: unknown) => void, subscription?: StreamSubscription) {
   const token = tokenStorage.get();
   const wsUrl = `${API_URL.replace("http", "ws")}/ws/stream?token=${token}`;
   const socket = new WebSocket(wsUrl);
+  if (subscription) {
+    socket.onopen = () => socket.send(JSON.stringify({ action: "subscribe", ...subscription }));
+  }
   socket.onmessage = (event) => {
+    let data: unknown;
     try {
-      onMessage(JSON.parse(event.data));
+      data = JSON.parse(event.data);
     } catch {
       onMessage(event.data);
+      return;
+    }
+    const frame = data as { type?: string; payload?: unknown };
+    if (frame && frame.type === "batch" && Array.isArray(frame.payload)) {
+      frame.payload.forEach((item) => onMessage(item));
+      return;
     }
+    onMessage(data);
   };
   return socket;
 }
@@ -103,7 +103,7 @@ export default function Dashboard() {
           return [alert, ...prev];
         });
       }
-    });
+    }, selectedPatientId ? { patient_ids: [selectedPatientId], all_alerts: true } : undefined);
     return () => socket.close();
   }, [selectedPatientId]);
 
@@ -0,0 +1,244 @@
+import argparse
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from simulator.recording import StreamRecorder, open_recorder
+from simulator.run_simulator import build_parser, build_ticks, load_patients
+
+
+logger = logging.getLogger("simulator.async_runner")
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class Reservoir:
+    """Uniform random sample of at most ``capacity`` values, plus their exact maximum.
+
+    Memory stays fixed however long the run is; percentiles are read from the
+    sample (Vitter's algorithm R).
+    """
+
+    def __init__(self, capacity: int = 10000) -> None:
+        self.capacity = capacity
+        self.samples: List[float] = []
+        self.count = 0
+        self.max = 0.0
+        self._random = random.Random(0)
+
+    def append(self, value: float) -> None:
+        self.count += 1
+        self.max = max(self.max, value)
+        if len(self.samples) < self.capacity:
+            self.samples.append(value)
+            return
+        index = self._random.randrange(self.count)
+        if index < self.capacity:
+            self.samples[index] = value
+
+
+@dataclass
+class RunnerStats:
+    """Counters and sampled lag/latency for one reporting interval or a whole run."""
+
+    ticks: int = 0
+    requests: int = 0
+    failures: int = 0
+    measurements: int = 0
+    lag: Reservoir = field(default_factory=Reservoir)
+    latency: Reservoir = field(default_factory=Reservoir)
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "ticks": self.ticks,
+            "requests": self.requests,
+            "failures": self.failures,
+            "measurements": self.measurements,
+            "lag_p50_ms": round(percentile(self.lag.samples, 0.5) * 1000, 1),
+            "lag_max_ms": round(self.lag.max * 1000, 1),
+            "latency_p50_ms": round(percentile(self.latency.samples, 0.5) * 1000, 1),
+            "latency_p95_ms": round(percentile(self.latency.samples, 0.95) * 1000, 1),
+        }
+
+
+class AsyncRunner:
+    """Sends simulator ticks on a fixed wall-clock schedule over one pooled client.
+
+    Tick ``n`` is due ``n * interval`` seconds after the run starts, whatever
+    the previous ticks cost. Requests run concurrently up to ``concurrency``;
+    when every slot is busy the scheduler waits for one. The delay between a
+    tick's due time and the moment it is dispatched is recorded as lag.
+    With a ``recorder`` every request body is recorded in dispatch order.
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        token: str,
+        concurrency: int,
+        interval: float,
+        batch: bool,
+        stats_interval: float,
+        recorder: Optional[StreamRecorder] = None,
+    ) -> None:
+        self._client = client
+        self._headers = {"Authorization": f"Bearer {token}"}
+        self._slots = asyncio.Semaphore(concurrency)
+        self._interval = interval
+        self._batch = batch
+        self._stats_interval = stats_interval
+        self._stats = RunnerStats()
+        self._totals = RunnerStats()
+        self._pending: set = set()
+        self._recorder = recorder
+
+    async def run(self, ticks) -> Dict[str, float]:
+        started = time.monotonic()
+        last_report = started
+        for index, items in enumerate(ticks):
+            due = started + index * self._interval
+            delay = due - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            lag = max(0.0, time.monotonic() - due)
+            self._stats.ticks += 1
+            self._stats.lag.append(lag)
+            self._totals.ticks += 1
+            self._totals.lag.append(lag)
+            if self._batch:
+                if items:
+                    await self._dispatch("/api/v1/vitals/ingest/batch", {"items": items}, self._count(items))
+            else:
+                for item in items:
+                    await self._dispatch("/api/v1/vitals/ingest", item, len(item["measurements"]))
+            if self._recorder:
+                self._recorder.flush()
+            if time.monotonic() - last_report >= self._stats_interval:
+                self._report()
+                last_report = time.monotonic()
+        if self._pending:
+            await asyncio.gather(*self._pending)
+        self._report()
+        return self._totals.summary()
+
+    async def replay(self, schedule: Iterable[Tuple[float, str, Dict]]) -> Dict[str, float]:
+        """Send ``(offset, path, body)`` requests, each ``offset`` seconds after the start.
+
+        Offsets must not decrease. An offset of zero for every request sends
+        as fast as the concurrency limit allows.
+        """
+        started = time.monotonic()
+        last_report = started
+        for offset, path, body in schedule:
+            due = started + offset
+            delay = due - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            lag = max(0.0, time.monotonic() - due)
+            for stats in (self._stats, self._totals):
+                stats.ticks += 1
+                stats.lag.append(lag)
+            measurements = self._count(body["items"]) if "items" in body else len(body["measurements"])
+            await self._dispatch(path, body, measurements)
+            if time.monotonic() - last_report >= self._stats_interval:
+                self._report()
+                last_report = time.monotonic()
+        if self._pending:
+            await asyncio.gather(*self._pending)
+        self._report()
+        return self._totals.summary()
+
+    @staticmethod
+    def _count(items: List[Dict]) -> int:
+        return sum(len(item["measurements"]) for item in items)
+
+    async def _dispatch(self, path: str, payload: Dict, measurements: int) -> None:
+        await self._slots.acquire()
+        if self._recorder:
+            self._recorder.record(path, payload)
+        task = asyncio.create_task(self._send(path, payload, measurements))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _send(self, path: str, payload: Dict, measurements: int) -> None:
+        started = time.monotonic()
+        try:
+            response = await self._client.post(path, json=payload, headers=self._headers)
+            response.raise_for_status()
+            failed = False
+        except httpx.HTTPError as exc:
+            logger.warning("Ingest request failed: %s", exc)
+            failed = True
+        finally:
+            self._slots.release()
+        latency = time.monotonic() - started
+        for stats in (self._stats, self._totals):
+            stats.requests += 1
+            stats.failures += failed
+            stats.measurements += 0 if failed else measurements
+            stats.latency.append(latency)
+
+    def _report(self) -> None:
+        summary = self._stats.summary()
+        if summary["lag_max_ms"] > self._interval * 1000:
+            logger.warning("Backend is falling behind the tick schedule: %s", summary)
+        else:
+            logger.info("%s", summary)
+        self._stats = RunnerStats()
+
+
+async def run_async_simulation(args: argparse.Namespace) -> Dict[str, float]:
+    patients = load_patients(Path(args.seed_path))
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    recorder = open_recorder(args.record)
+    try:
+        async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+            response = await client.post(
+                "/api/v1/auth/login", json={"username": args.username, "password": args.password}
+            )
+            response.raise_for_status()
+            runner = AsyncRunner(
+                client,
+                token=response.json()["access_token"],
+                concurrency=args.concurrency,
+                interval=args.sample_frequency_seconds,
+                batch=args.batch,
+                stats_interval=args.stats_interval,
+                recorder=recorder,
+            )
+            return await runner.run(build_ticks(args, patients, datetime.utcnow()))
+    finally:
+        if recorder:
+            recorder.close()
+
+
+def build_async_parser() -> argparse.ArgumentParser:
+    parser = build_parser()
+    parser.description = "RPM Simulator Runner (asyncio, pooled connections)"
+    parser.add_argument("--concurrency", type=int, default=16, help="Maximum ingest requests in flight")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--stats-interval", type=float, default=10.0, help="Seconds between lag/latency log lines")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    totals = asyncio.run(run_async_simulation(build_async_parser().parse_args(argv)))
+    logger.info("Run complete: %s", totals)
+
+
+if __name__ == "__main__":
+    main()
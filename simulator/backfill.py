@@ -0,0 +1,410 @@
+"""Fast-forward backfill: generate days of history for a cohort and write it straight to storage.
+
+Run from the repository root with the backend importable, e.g.
+``PYTHONPATH=backend python -m simulator.backfill --days 7 --output postgres --evaluate-rules``.
+"""
+import argparse
+import csv
+import io
+import json
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import get_settings
+from app.services.rules_engine import (
+    CORRELATION_HEART_RATE_ABOVE,
+    CORRELATION_RULE,
+    CORRELATION_SPO2_BELOW,
+    DEFAULT_RULES,
+    ESCALATION_THRESHOLD,
+    ESCALATION_WINDOW,
+    OPERATORS,
+)
+from simulator.generator import METRIC_NAMES, METRICS, UNITS, VectorizedVitalGenerator, VitalBlock
+from simulator.run_simulator import add_generation_arguments, build_scenario, load_patients
+
+
+logger = logging.getLogger("simulator.backfill")
+
+STEP = timedelta(minutes=1)
+STATUS_NAMES = ("normal", "warning", "critical")
+VITAL_COLUMNS = ("patient_id", "timestamp", "metric", "value", "unit", "normal_low", "normal_high", "status", "source")
+ALERT_COLUMNS = ("id", "patient_id", "metric", "severity", "trigger_rule", "timestamp", "acknowledged")
+ROLLUP_COLUMNS = ("patient_id", "resolution", "metric", "bucket_start", "count", "sum", "m2", "min", "max")
+LATEST_COLUMNS = ("patient_id", "metric", "value", "timestamp")
+
+
+class BlockRuleEvaluator:
+    """Vectorized equivalent of ``evaluate_measurement`` plus ``evaluate_correlation``.
+
+    Steps through a block one minute at a time, evaluating every patient and
+    metric at once. Warning counts for escalation are kept in a ring buffer
+    covering ``ESCALATION_WINDOW``, so state carries across blocks exactly as
+    the rules engine's sliding window does during live ingest.
+    """
+
+    def __init__(self, rules: Sequence[Dict], patients: int) -> None:
+        self._rules: List[Tuple[int, Dict]] = [
+            (METRIC_NAMES.index(rule["metric"]), rule)
+            for rule in rules
+            if rule["metric"] in METRICS and rule["operator"] in OPERATORS
+        ]
+        self._window_steps = int(ESCALATION_WINDOW / STEP)
+        self._ring = np.zeros((self._window_steps + 1, patients, len(METRIC_NAMES)), dtype=np.int16)
+        self._warnings = np.zeros((patients, len(METRIC_NAMES)), dtype=np.int32)
+        self._step = 0
+        self._heart_rate = METRIC_NAMES.index("heart_rate")
+        self._spo2 = METRIC_NAMES.index("spo2")
+
+    def evaluate(self, block: VitalBlock) -> Tuple[np.ndarray, List[Tuple]]:
+        """Return per-reading status codes (indexes into ``STATUS_NAMES``) and alert rows."""
+        status = block.warning.astype(np.int8)
+        alerts: List[Tuple] = []
+        present = block.present
+        for step, timestamp in enumerate(block.timestamps):
+            slot = self._step % len(self._ring)
+            self._warnings -= self._ring[slot]
+            self._ring[slot] = 0
+            values = block.values[:, :, step]
+            severity = np.zeros(present.shape, dtype=np.int8)
+            for metric, rule in self._rules:
+                matched = present[:, metric] & OPERATORS[rule["operator"]](values[:, metric], rule["threshold"])
+                if not matched.any():
+                    continue
+                if rule["severity"] == "warning":
+                    escalated = matched & (self._warnings[:, metric] >= ESCALATION_THRESHOLD)
+                    recorded = matched & ~escalated
+                    self._ring[slot, :, metric] += recorded
+                    self._warnings[:, metric] += recorded
+                    for patient in np.flatnonzero(recorded).tolist():
+                        alerts.append(_alert(block.patient_ids[patient], rule["metric"], "warning", rule["name"], timestamp))
+                    for patient in np.flatnonzero(escalated).tolist():
+                        alerts.append(
+                            _alert(block.patient_ids[patient], rule["metric"], "critical", f"{rule['name']} (escalated)", timestamp)
+                        )
+                    np.maximum(severity[:, metric], np.where(escalated, 2, 1) * matched, out=severity[:, metric])
+                else:
+                    code = 2 if rule["severity"] == "critical" else 1
+                    for patient in np.flatnonzero(matched).tolist():
+                        alerts.append(_alert(block.patient_ids[patient], rule["metric"], rule["severity"], rule["name"], timestamp))
+                    np.maximum(severity[:, metric], code * matched, out=severity[:, metric])
+            alerted = severity > 0
+            status[:, :, step] = np.where(alerted, severity, status[:, :, step])
+            # Every tick carries all of a patient's metrics, so the latest values
+            # inside CORRELATION_WINDOW are always the current tick's.
+            correlated = (
+                present[:, self._heart_rate]
+                & present[:, self._spo2]
+                & (values[:, self._heart_rate] > CORRELATION_HEART_RATE_ABOVE)
+                & (values[:, self._spo2] < CORRELATION_SPO2_BELOW)
+            )
+            for patient in np.flatnonzero(correlated).tolist():
+                alerts.append(_alert(block.patient_ids[patient], "multi_metric", "critical", CORRELATION_RULE, timestamp))
+            self._step += 1
+        return status, alerts
+
+
+def _alert(patient_id: str, metric: str, severity: str, trigger_rule: str, timestamp: datetime) -> Tuple:
+    return (str(uuid.uuid4()), patient_id, metric, severity, trigger_rule, timestamp, False)
+
+
+def iter_vital_rows(block: VitalBlock, status: np.ndarray) -> Iterator[Tuple]:
+    """Rows in ``VITAL_COLUMNS`` order, time-major like live ingest."""
+    patients, metrics = np.nonzero(block.present)
+    patient_ids = [block.patient_ids[patient] for patient in patients.tolist()]
+    names = [METRIC_NAMES[metric] for metric in metrics.tolist()]
+    units = [UNITS[metric] for metric in metrics.tolist()]
+    lows = [METRICS[name].normal_low for name in names]
+    highs = [METRICS[name].normal_high for name in names]
+    for step, timestamp in enumerate(block.timestamps):
+        values = block.values[patients, metrics, step].tolist()
+        statuses = status[patients, metrics, step].tolist()
+        for index, value in enumerate(values):
+            yield (
+                patient_ids[index],
+                timestamp,
+                names[index],
+                value,
+                units[index],
+                lows[index],
+                highs[index],
+                STATUS_NAMES[statuses[index]],
+                "simulator_backfill",
+            )
+
+
+def block_rollups(block: VitalBlock) -> Iterator[Tuple]:
+    """1-minute and 1-hour rollup rows for a block that lies within one hour."""
+    patients, metrics = np.nonzero(block.present)
+    values = block.values[patients, metrics, :]
+    hour = block.timestamps[0].replace(minute=0, second=0, microsecond=0)
+    counts = values.shape[1]
+    means = values.mean(axis=1)
+    m2 = ((values - means[:, None]) ** 2).sum(axis=1)
+    rows = zip(patients.tolist(), metrics.tolist(), values.sum(axis=1).tolist(), m2.tolist(), values.min(axis=1).tolist(), values.max(axis=1).tolist())
+    for patient, metric, total, deviation, low, high in rows:
+        yield (block.patient_ids[patient], "1h", METRIC_NAMES[metric], hour, counts, total, deviation, low, high)
+    for step, timestamp in enumerate(block.timestamps):
+        for patient, metric, value in zip(patients.tolist(), metrics.tolist(), values[:, step].tolist()):
+            yield (block.patient_ids[patient], "1m", METRIC_NAMES[metric], timestamp, 1, value, 0.0, value, value)
+
+
+def block_latest(block: VitalBlock) -> Iterator[Tuple]:
+    """``vital_latest`` rows: the last reading of every (patient, metric) in the block."""
+    patients, metrics = np.nonzero(block.present)
+    values = block.values[patients, metrics, -1].tolist()
+    timestamp = block.timestamps[-1]
+    for patient, metric, value in zip(patients.tolist(), metrics.tolist(), values):
+        yield (block.patient_ids[patient], METRIC_NAMES[metric], value, timestamp)
+
+
+class PostgresWriter:
+    """COPY vitals, rollups and alerts into the backend database.
+
+    Partitions are created up front with the backend's own naming and
+    interval. Rollups and latest values are staged in temporary tables and
+    merged with the same rules as live ingest.
+    """
+
+    MERGE_ROLLUPS = """
+        INSERT INTO vital_rollups AS r (patient_id, resolution, metric, bucket_start, count, sum, m2, min, max)
+        SELECT patient_id, resolution, metric, bucket_start, count, sum, m2, min, max FROM backfill_rollups
+        ON CONFLICT (patient_id, resolution, metric, bucket_start) DO UPDATE SET
+            count = r.count + excluded.count,
+            sum = r.sum + excluded.sum,
+            m2 = r.m2 + excluded.m2
+                + (excluded.sum / excluded.count - r.sum / r.count) ^ 2 * r.count * excluded.count / (r.count + excluded.count),
+            min = least(r.min, excluded.min),
+            max = greatest(r.max, excluded.max)
+    """
+
+    MERGE_LATEST = """
+        INSERT INTO vital_latest AS l (patient_id, metric, value, timestamp)
+        SELECT patient_id, metric, value, timestamp FROM backfill_latest
+        ON CONFLICT (patient_id, metric) DO UPDATE SET value = excluded.value, timestamp = excluded.timestamp
+        WHERE excluded.timestamp >= l.timestamp
+    """
+
+    def __init__(self, database_url: str) -> None:
+        from sqlalchemy import create_engine
+
+        self._engine = create_engine(database_url)
+        self._connection = self._engine.raw_connection()
+
+    def rules(self) -> List[Dict]:
+        with self._connection.cursor() as cursor:
+            cursor.execute("SELECT name, metric, operator, threshold, severity FROM rule_definitions WHERE enabled")
+            rows = cursor.fetchall()
+        if not rows:
+            return DEFAULT_RULES
+        return [dict(zip(("name", "metric", "operator", "threshold", "severity"), row)) for row in rows]
+
+    def prepare(self, patient_ids: Sequence[str], start: datetime, end: datetime) -> None:
+        from sqlalchemy.orm import Session
+
+        from app.services.partitions import ensure_partitions
+
+        with self._connection.cursor() as cursor:
+            cursor.execute("SELECT id FROM patients WHERE id = ANY(%s)", (list(patient_ids),))
+            missing = set(patient_ids) - {row[0] for row in cursor.fetchall()}
+        if missing:
+            raise SystemExit(f"{len(missing)} patients are not registered, e.g. {sorted(missing)[:5]}")
+        with Session(self._engine) as db:
+            ensure_partitions(db, start, end, get_settings().vitals_partition_interval)
+        with self._connection.cursor() as cursor:
+            # Each block is committed on its own and a lost tail can simply be regenerated.
+            cursor.execute("SET synchronous_commit TO off")
+            cursor.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS backfill_rollups "
+                "(LIKE vital_rollups INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+            )
+            cursor.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS backfill_latest "
+                "(LIKE vital_latest INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+            )
+        self._connection.commit()
+
+    @staticmethod
+    def _copy(cursor, table: str, columns: Sequence[str], rows) -> None:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+    def write(self, block: VitalBlock, status: np.ndarray, alerts: List[Tuple]) -> None:
+        # COPY skips the ORM's created_at default, so stamp the insert time explicitly.
+        created_at = (datetime.utcnow(),)
+        vitals = (row + created_at for row in iter_vital_rows(block, status))
+        with self._connection.cursor() as cursor:
+            self._copy(cursor, "vital_signs", VITAL_COLUMNS + ("created_at",), vitals)
+            self._copy(cursor, "backfill_rollups", ROLLUP_COLUMNS, block_rollups(block))
+            cursor.execute(self.MERGE_ROLLUPS)
+            self._copy(cursor, "backfill_latest", LATEST_COLUMNS, block_latest(block))
+            cursor.execute(self.MERGE_LATEST)
+            if alerts:
+                self._copy(cursor, "alerts", ALERT_COLUMNS, alerts)
+        self._connection.commit()
+
+    def close(self) -> None:
+        self._connection.close()
+        self._engine.dispose()
+
+
+class NdjsonWriter:
+    """Append vitals and alerts to ``vitals.ndjson`` and ``alerts.ndjson``.
+
+    Vital records use the same fields as ``GET /vitals/export?format=ndjson``.
+    """
+
+    def __init__(self, out_dir: Path) -> None:
+        out_dir.mkdir(parents=True, exist_ok=True)
+        self._vitals = (out_dir / "vitals.ndjson").open("a")
+        self._alerts = (out_dir / "alerts.ndjson").open("a")
+
+    def rules(self) -> List[Dict]:
+        return DEFAULT_RULES
+
+    def prepare(self, patient_ids: Sequence[str], start: datetime, end: datetime) -> None:
+        pass
+
+    @staticmethod
+    def _lines(columns: Sequence[str], rows) -> str:
+        return "".join(
+            json.dumps(dict(zip(columns, row)), separators=(",", ":"), default=datetime.isoformat) + "\n" for row in rows
+        )
+
+    def write(self, block: VitalBlock, status: np.ndarray, alerts: List[Tuple]) -> None:
+        self._vitals.write(self._lines(VITAL_COLUMNS, iter_vital_rows(block, status)))
+        self._alerts.write(self._lines(ALERT_COLUMNS, alerts))
+
+    def close(self) -> None:
+        self._vitals.close()
+        self._alerts.close()
+
+
+class ParquetWriter:
+    """Write ``vitals.parquet`` and ``alerts.parquet`` with one row group per block (requires ``pyarrow``)."""
+
+    def __init__(self, out_dir: Path) -> None:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet output requires pyarrow: pip install pyarrow")
+        self._pa = pa
+        out_dir.mkdir(parents=True, exist_ok=True)
+        self._vital_schema = pa.schema(
+            [
+                ("patient_id", pa.string()),
+                ("timestamp", pa.timestamp("us")),
+                ("metric", pa.string()),
+                ("value", pa.float64()),
+                ("unit", pa.string()),
+                ("normal_low", pa.float64()),
+                ("normal_high", pa.float64()),
+                ("status", pa.string()),
+                ("source", pa.string()),
+            ]
+        )
+        self._alert_schema = pa.schema(
+            [
+                ("id", pa.string()),
+                ("patient_id", pa.string()),
+                ("metric", pa.string()),
+                ("severity", pa.string()),
+                ("trigger_rule", pa.string()),
+                ("timestamp", pa.timestamp("us")),
+                ("acknowledged", pa.bool_()),
+            ]
+        )
+        self._vitals = pq.ParquetWriter(out_dir / "vitals.parquet", self._vital_schema)
+        self._alerts = pq.ParquetWriter(out_dir / "alerts.parquet", self._alert_schema)
+
+    def rules(self) -> List[Dict]:
+        return DEFAULT_RULES
+
+    def prepare(self, patient_ids: Sequence[str], start: datetime, end: datetime) -> None:
+        pass
+
+    def _table(self, schema, rows: List[Tuple]):
+        columns = list(zip(*rows)) if rows else [[] for _ in schema.names]
+        return self._pa.Table.from_arrays([self._pa.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema)
+
+    def write(self, block: VitalBlock, status: np.ndarray, alerts: List[Tuple]) -> None:
+        self._vitals.write_table(self._table(self._vital_schema, list(iter_vital_rows(block, status))))
+        if alerts:
+            self._alerts.write_table(self._table(self._alert_schema, alerts))
+
+    def close(self) -> None:
+        self._vitals.close()
+        self._alerts.close()
+
+
+def build_writer(args: argparse.Namespace):
+    if args.output == "postgres":
+        return PostgresWriter(args.database_url or get_settings().database_url)
+    if args.output == "parquet":
+        return ParquetWriter(Path(args.out_dir))
+    return NdjsonWriter(Path(args.out_dir))
+
+
+def run_backfill(args: argparse.Namespace) -> Dict[str, float]:
+    patients = load_patients(Path(args.seed_path))
+    scenario = build_scenario(args)
+    total_minutes = args.days * 24 * 60
+    start = args.start or datetime.utcnow() - timedelta(minutes=total_minutes)
+    # Hour-aligned blocks keep every block inside a single 1h rollup bucket.
+    start = start.replace(minute=0, second=0, microsecond=0)
+    writer = build_writer(args)
+    started = time.perf_counter()
+    readings = alerts_written = 0
+    try:
+        writer.prepare([patient["id"] for patient in patients], start, start + timedelta(minutes=total_minutes))
+        evaluator = BlockRuleEvaluator(writer.rules(), len(patients)) if args.evaluate_rules else None
+        generator = VectorizedVitalGenerator(seed=args.seed)
+        for block in generator.generate_blocks(patients, scenario, start, total_minutes, block_minutes=60):
+            if evaluator:
+                status, alerts = evaluator.evaluate(block)
+            else:
+                status, alerts = block.warning.astype(np.int8), []
+            writer.write(block, status, alerts)
+            readings += int(block.present.sum()) * len(block.timestamps)
+            alerts_written += len(alerts)
+            logger.info("Backfilled through %s (%d readings, %d alerts)", block.timestamps[-1], readings, alerts_written)
+    finally:
+        writer.close()
+    elapsed = time.perf_counter() - started
+    return {
+        "patients": len(patients),
+        "readings": readings,
+        "alerts": alerts_written,
+        "seconds": round(elapsed, 2),
+        "readings_per_second": round(readings / elapsed) if elapsed else 0,
+    }
+
+
+def build_backfill_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="RPM Simulator backfill: generate history without the HTTP API")
+    add_generation_arguments(parser)
+    parser.add_argument("--days", type=int, default=1)
+    parser.add_argument("--start", type=datetime.fromisoformat, help="First timestamp (UTC); defaults to --days ago")
+    parser.add_argument("--output", choices=["postgres", "ndjson", "parquet"], default="postgres")
+    parser.add_argument("--database-url", help="Defaults to the backend's DATABASE_URL")
+    parser.add_argument("--out-dir", default="backfill", help="Directory for ndjson/parquet output")
+    parser.add_argument("--evaluate-rules", action="store_true", help="Generate alerts with the rules engine's semantics")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    logger.info("Backfill complete: %s", run_backfill(build_backfill_parser().parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
 import math
 import random
 from dataclasses import dataclass
-from datetime import datetime
-from typing import Dict, List
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Sequence
+
+import numpy as np
 
 from simulator.scenarios import Scenario
 
@@ -81,3 +83,137 @@ class VitalGenerator:
                 }
             )
         return measurements
+
+
+METRIC_NAMES = list(METRICS)
+UNITS = [METRICS[metric].unit for metric in METRIC_NAMES]
+NORMAL_LOW = np.array([METRICS[metric].normal_low for metric in METRIC_NAMES])
+NORMAL_HIGH = np.array([METRICS[metric].normal_high for metric in METRIC_NAMES])
+CIRCADIAN_AMP = np.array([METRICS[metric].circadian_amp for metric in METRIC_NAMES])
+ACTIVITY = METRIC_NAMES.index("activity")
+
+
+@dataclass
+class VitalBlock:
+    """Generated vitals for (patients x metrics x timesteps).
+
+    ``present`` marks the metrics each patient's baseline defines; other
+    cells hold no reading. Dicts are only built by ``measurements``/``items``.
+    """
+
+    patient_ids: List[str]
+    timestamps: List[datetime]
+    values: np.ndarray
+    warning: np.ndarray
+    present: np.ndarray
+
+    def measurements(self, patient: int, step: int) -> List[Dict]:
+        timestamp = self.timestamps[step].isoformat()
+        values = self.values[patient, :, step].tolist()
+        warning = self.warning[patient, :, step].tolist()
+        return [
+            {
+                "timestamp": timestamp,
+                "metric": METRIC_NAMES[metric],
+                "value": values[metric],
+                "unit": UNITS[metric],
+                "normal_low": METRICS[METRIC_NAMES[metric]].normal_low,
+                "normal_high": METRICS[METRIC_NAMES[metric]].normal_high,
+                "status": "warning" if warning[metric] else "normal",
+                "source": "simulator_v1",
+            }
+            for metric in np.flatnonzero(self.present[patient]).tolist()
+        ]
+
+    def items(self, step: int) -> List[Dict]:
+        return [
+            {"patient_id": patient_id, "measurements": self.measurements(patient, step)}
+            for patient, patient_id in enumerate(self.patient_ids)
+        ]
+
+
+class VectorizedVitalGenerator:
+    """Array-at-a-time counterpart of ``VitalGenerator``.
+
+    Applies the same baseline, noise, circadian, drift, acute event and
+    activity jitter rules to a whole cohort and time range at once using a
+    seeded NumPy ``Generator``. Draws differ from ``VitalGenerator`` for the
+    same seed, but the distributions are the same.
+    """
+
+    def __init__(self, seed: int = 42) -> None:
+        self.rng = np.random.default_rng(seed)
+
+    @staticmethod
+    def baselines(patients: Sequence[Dict]) -> Dict[str, np.ndarray]:
+        mean = np.zeros((len(patients), len(METRIC_NAMES)))
+        std = np.ones((len(patients), len(METRIC_NAMES)))
+        present = np.zeros((len(patients), len(METRIC_NAMES)), dtype=bool)
+        for row, patient in enumerate(patients):
+            profile = patient.get("baseline_profile", {})
+            for column, metric in enumerate(METRIC_NAMES):
+                base = profile.get(metric, {}).get("mean")
+                if base is None:
+                    continue
+                mean[row, column] = base
+                std[row, column] = profile.get(metric, {}).get("std", 1.0)
+                present[row, column] = True
+        return {"mean": mean, "std": std, "present": present}
+
+    def generate_block(
+        self,
+        patients: Sequence[Dict],
+        scenario: Scenario,
+        start_time: datetime,
+        first_minute: int,
+        steps: int,
+        baselines: Dict[str, np.ndarray] = None,
+    ) -> VitalBlock:
+        """Generate one reading per metric per minute for ``steps`` minutes from ``first_minute``."""
+        baselines = baselines or self.baselines(patients)
+        minutes = np.arange(first_minute, first_minute + steps)
+        timestamps = [start_time + timedelta(minutes=int(minute)) for minute in minutes]
+        hours = np.array([timestamp.hour + timestamp.minute / 60 for timestamp in timestamps])
+        circadian = np.sin((hours + 3) / 24 * 2 * math.pi)[None, :] * CIRCADIAN_AMP[:, None]
+        drift_rate = np.array([scenario.drift_per_hour.get(metric, 0.0) for metric in METRIC_NAMES])
+        drift = drift_rate[:, None] * (minutes / 60)[None, :]
+        multiplier = np.ones((len(METRIC_NAMES), steps))
+        if scenario.acute_event_duration_minutes:
+            start = scenario.acute_event_start_minute
+            active = (minutes >= start) & (minutes <= start + scenario.acute_event_duration_minutes)
+            event = np.array([scenario.acute_event_multiplier.get(metric, 1.0) for metric in METRIC_NAMES])
+            multiplier[:, active] = event[:, None]
+
+        shape = (len(patients), len(METRIC_NAMES), steps)
+        # Operate in place on the noise draw to avoid block-sized temporaries.
+        values = self.rng.standard_normal(shape)
+        values *= baselines["std"][:, :, None]
+        values += baselines["mean"][:, :, None]
+        values += (circadian + drift)[None, :, :]
+        values *= multiplier[None, :, :]
+        activity = values[:, ACTIVITY, :]
+        activity += self.rng.uniform(-500, 500, (len(patients), steps))
+        np.maximum(activity, 0.0, out=activity)
+        np.round(values, 2, out=values)
+        warning = (values < NORMAL_LOW[None, :, None]) | (values > NORMAL_HIGH[None, :, None])
+        return VitalBlock(
+            patient_ids=[patient["id"] for patient in patients],
+            timestamps=timestamps,
+            values=values,
+            warning=warning,
+            present=baselines["present"],
+        )
+
+    def generate_blocks(
+        self,
+        patients: Sequence[Dict],
+        scenario: Scenario,
+        start_time: datetime,
+        total_minutes: int,
+        block_minutes: int = 60,
+    ) -> Iterator[VitalBlock]:
+        """Yield consecutive blocks so memory stays bounded for long runs."""
+        baselines = self.baselines(patients)
+        for first_minute in range(0, total_minutes, block_minutes):
+            steps = min(block_minutes, total_minutes - first_minute)
+            yield self.generate_block(patients, scenario, start_time, first_minute, steps, baselines=baselines)
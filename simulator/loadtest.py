@@ -0,0 +1,252 @@
+"""End-to-end load test: ingest at a target rate while websocket subscribers measure delivery.
+
+``python -m simulator.loadtest --rate 50 --duration 60 --subscribers 10 --output results.json``
+
+Requires the ``websockets`` package (installed with ``uvicorn[standard]``).
+"""
+import argparse
+import asyncio
+import json
+import logging
+import subprocess
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from simulator.async_runner import percentile
+from simulator.generator import VitalGenerator
+from simulator.run_simulator import load_patients
+from simulator.scenarios import SCENARIOS
+
+
+logger = logging.getLogger("simulator.loadtest")
+
+
+def latency_summary(samples: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 0.5) * 1000, 2),
+        "p95_ms": round(percentile(samples, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 2),
+        "max_ms": round(max(samples, default=0.0) * 1000, 2),
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True, cwd=Path(__file__).parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@dataclass
+class LoadTestResults:
+    sent_requests: int = 0
+    failed_requests: int = 0
+    sent_measurements: int = 0
+    http_latency: List[float] = field(default_factory=list)
+    vital_latency: List[float] = field(default_factory=list)
+    alert_latency: List[float] = field(default_factory=list)
+    frames: int = 0
+    vitals_received: int = 0
+    alerts_received: int = 0
+
+
+class LoadTest:
+    """Drive ``/vitals/ingest`` at ``rate`` requests per second and time websocket delivery.
+
+    Every measurement carries a unique timestamp, so a ``vital`` event is
+    matched to its send time by (patient, metric, timestamp). An ``alert``
+    event is matched by (patient, timestamp), which also covers multi-metric
+    alerts. Frames are unpacked whether they hold a single event or a batch.
+    """
+
+    def __init__(self, args: argparse.Namespace, patients: List[Dict]) -> None:
+        self._args = args
+        self._patients = patients
+        self._generator = VitalGenerator(seed=args.seed)
+        self._scenario = SCENARIOS[args.scenario]
+        self._sent_vitals: Dict[Tuple[str, str, str], float] = {}
+        self._sent_payloads: Dict[Tuple[str, str], float] = {}
+        self._results = LoadTestResults()
+        self._slots = asyncio.Semaphore(args.concurrency)
+        self._stopping = asyncio.Event()
+        self._started_at = datetime.utcnow()
+
+    def _handle_event(self, event: Dict, received: float) -> None:
+        payload = event.get("payload") or {}
+        if event.get("type") == "vital":
+            sent = self._sent_vitals.get((payload.get("patient_id"), payload.get("metric"), payload.get("timestamp")))
+            if sent is not None:
+                self._results.vitals_received += 1
+                self._results.vital_latency.append(received - sent)
+        elif event.get("type") == "alert" and not payload.get("acknowledged"):
+            sent = self._sent_payloads.get((payload.get("patient_id"), payload.get("timestamp")))
+            if sent is not None:
+                self._results.alerts_received += 1
+                self._results.alert_latency.append(received - sent)
+
+    def _decode(self, frame):
+        if isinstance(frame, bytes):
+            import msgpack
+
+            return msgpack.unpackb(frame)
+        return json.loads(frame)
+
+    async def _subscriber(self, token: str, ready: asyncio.Event, connected: List[int]) -> None:
+        import websockets
+
+        base = self._args.base_url.replace("http://", "ws://").replace("https://", "wss://")
+        url = f"{base}/ws/stream?token={token}&encoding={self._args.encoding}"
+        async with websockets.connect(url, max_size=None) as websocket:
+            connected.append(1)
+            if len(connected) == self._args.subscribers:
+                ready.set()
+            while not self._stopping.is_set():
+                try:
+                    frame = await asyncio.wait_for(websocket.recv(), timeout=0.5)
+                except asyncio.TimeoutError:
+                    continue
+                received = time.monotonic()
+                message = self._decode(frame)
+                self._results.frames += 1
+                events = message["payload"] if message.get("type") == "batch" else [message]
+                for event in events:
+                    self._handle_event(event, received)
+
+    async def _send(self, client: httpx.AsyncClient, headers: Dict, patient_id: str, measurements: List[Dict]) -> None:
+        started = time.monotonic()
+        for measurement in measurements:
+            self._sent_vitals[(patient_id, measurement["metric"], measurement["timestamp"])] = started
+        self._sent_payloads[(patient_id, measurements[0]["timestamp"])] = started
+        try:
+            response = await client.post(
+                "/api/v1/vitals/ingest", json={"patient_id": patient_id, "measurements": measurements}, headers=headers
+            )
+            response.raise_for_status()
+            self._results.sent_measurements += len(measurements)
+        except httpx.HTTPError as exc:
+            logger.warning("Ingest request failed: %s", exc)
+            self._results.failed_requests += 1
+        finally:
+            self._slots.release()
+            self._results.sent_requests += 1
+            self._results.http_latency.append(time.monotonic() - started)
+
+    async def _drive(self, client: httpx.AsyncClient, token: str) -> float:
+        headers = {"Authorization": f"Bearer {token}"}
+        interval = 1.0 / self._args.rate
+        total = int(self._args.rate * self._args.duration)
+        base_time = datetime.utcnow()
+        pending = set()
+        started = time.monotonic()
+        for index in range(total):
+            due = started + index * interval
+            delay = due - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            patient = self._patients[index % len(self._patients)]
+            # Device time follows the send schedule, so every (patient, metric, timestamp) is unique.
+            timestamp = base_time + timedelta(seconds=index * interval)
+            minute = index // len(self._patients)
+            measurements = self._generator.generate(patient.get("baseline_profile", {}), self._scenario, timestamp, minute)
+            if not measurements:
+                continue
+            await self._slots.acquire()
+            task = asyncio.create_task(self._send(client, headers, patient["id"], measurements))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        if pending:
+            await asyncio.gather(*pending)
+        return time.monotonic() - started
+
+    async def run(self) -> Dict:
+        self._started_at = datetime.utcnow()
+        limits = httpx.Limits(max_connections=self._args.concurrency, max_keepalive_connections=self._args.concurrency)
+        async with httpx.AsyncClient(base_url=self._args.base_url, limits=limits, timeout=30) as client:
+            response = await client.post(
+                "/api/v1/auth/login", json={"username": self._args.username, "password": self._args.password}
+            )
+            response.raise_for_status()
+            token = response.json()["access_token"]
+            ready = asyncio.Event()
+            connected: List[int] = []
+            subscribers = [
+                asyncio.create_task(self._subscriber(token, ready, connected)) for _ in range(self._args.subscribers)
+            ]
+            if subscribers:
+                await asyncio.wait_for(ready.wait(), timeout=30)
+            elapsed = await self._drive(client, token)
+            await asyncio.sleep(self._args.drain_seconds)
+            self._stopping.set()
+            await asyncio.gather(*subscribers, return_exceptions=True)
+        return self._report(elapsed)
+
+    def _report(self, elapsed: float) -> Dict:
+        results = self._results
+        expected_vitals = results.sent_measurements * self._args.subscribers
+        return {
+            "commit": git_commit(),
+            "started_at": self._started_at.isoformat(),
+            "parameters": {
+                key: getattr(self._args, key)
+                for key in ("base_url", "rate", "duration", "subscribers", "concurrency", "encoding", "scenario", "seed")
+            },
+            "patients": len(self._patients),
+            "elapsed_seconds": round(elapsed, 3),
+            "ingest": {
+                "requests": results.sent_requests,
+                "failed": results.failed_requests,
+                "measurements": results.sent_measurements,
+                "requests_per_second": round(results.sent_requests / elapsed, 2) if elapsed else 0.0,
+                "measurements_per_second": round(results.sent_measurements / elapsed, 2) if elapsed else 0.0,
+                "latency": latency_summary(results.http_latency),
+            },
+            "delivery": {
+                "frames": results.frames,
+                "vitals_received": results.vitals_received,
+                "vitals_expected": expected_vitals,
+                "vitals_missing": max(0, expected_vitals - results.vitals_received),
+                "alerts_received": results.alerts_received,
+                "vital_latency": latency_summary(results.vital_latency),
+                "alert_latency": latency_summary(results.alert_latency),
+            },
+        }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="RPM end-to-end load test")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--seed-path", default="backend/data/seed_patients.json")
+    parser.add_argument("--username", default="simulator")
+    parser.add_argument("--password", default="simulator123")
+    parser.add_argument("--rate", type=float, default=20.0, help="Ingest requests per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to drive ingest")
+    parser.add_argument("--subscribers", type=int, default=5, help="Websocket clients held open")
+    parser.add_argument("--concurrency", type=int, default=32, help="Maximum ingest requests in flight")
+    parser.add_argument("--encoding", choices=["json", "msgpack"], default="json")
+    parser.add_argument("--scenario", choices=SCENARIOS.keys(), default="stable")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--drain-seconds", type=float, default=2.0, help="Wait for late frames after the last request")
+    parser.add_argument("--output", help="JSON results file (default: loadtest-<UTC timestamp>.json)")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    args = build_parser().parse_args(argv)
+    report = asyncio.run(LoadTest(args, load_patients(Path(args.seed_path))).run())
+    output = Path(args.output or f"loadtest-{datetime.utcnow():%Y%m%dT%H%M%S}.json")
+    output.write_text(json.dumps(report, indent=2))
+    logger.info("Wrote %s: %s", output, json.dumps({"ingest": report["ingest"], "delivery": report["delivery"]}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""Expand the seed patients into a large synthetic population.
+
+``python -m simulator.population --count 100000 --output population.ndjson.gz``
+writes one patient per line. ``--register`` also posts them to ``/patients/batch``.
+"""
+import argparse
+import gzip
+import json
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import httpx
+import numpy as np
+
+from simulator.run_simulator import authenticate, load_patients
+
+
+logger = logging.getLogger("simulator.population")
+
+FIRST_NAMES = [
+    "Alex", "Avery", "Blake", "Casey", "Dana", "Drew", "Emery", "Finley", "Harper", "Jordan",
+    "Kai", "Lee", "Morgan", "Noel", "Parker", "Quinn", "Reese", "Riley", "Rowan", "Sage",
+    "Skyler", "Taylor", "Jamie", "Robin",
+]
+LAST_NAMES = [
+    "Adams", "Baker", "Chen", "Diaz", "Evans", "Fischer", "Garcia", "Hughes", "Ito", "Jensen",
+    "Khan", "Lopez", "Moreau", "Nguyen", "Okafor", "Patel", "Rossi", "Silva", "Tanaka", "Usman",
+    "Varga", "Weber", "Kim", "Santos",
+]
+# Physiological hard limits applied after jittering a template's baseline means.
+MEAN_LIMITS = {"spo2": (80.0, 100.0), "temperature": (35.0, 40.0), "activity": (0.0, 30000.0)}
+
+
+@dataclass
+class PopulationConfig:
+    """Sampling distributions for synthetic patients; every field can be overridden from JSON."""
+
+    risk_weights: Dict[str, float] = field(default_factory=lambda: {"low": 0.3, "medium": 0.45, "high": 0.25})
+    status_weights: Dict[str, float] = field(default_factory=lambda: {"active": 0.9, "paused": 0.07, "discharged": 0.03})
+    # Sd of each baseline mean around the template's, in units of the template's std.
+    mean_jitter: float = 1.0
+    # Log-normal sigma applied multiplicatively to each baseline std.
+    std_sigma: float = 0.2
+    age_sd: float = 8.0
+    age_range: List[int] = field(default_factory=lambda: [18, 100])
+    body_jitter: float = 0.08
+    # Chance to keep each template diagnosis, and to add one more from the pool.
+    keep_diagnosis: float = 0.85
+    extra_diagnosis: float = 0.15
+    clinicians: int = 50
+    id_prefix: str = "syn_"
+
+    @classmethod
+    def from_file(cls, path: Optional[str]) -> "PopulationConfig":
+        if not path:
+            return cls()
+        return cls(**json.loads(Path(path).read_text()))
+
+
+def _weights(choices: Dict[str, float]):
+    names = list(choices)
+    probabilities = np.array([choices[name] for name in names], dtype=float)
+    return names, probabilities / probabilities.sum()
+
+
+def expand_population(
+    templates: List[Dict],
+    count: int,
+    seed: int = 42,
+    config: Optional[PopulationConfig] = None,
+    chunk_size: int = 10000,
+) -> Iterator[Dict]:
+    """Yield ``count`` patients shaped like ``seed_patients.json`` entries.
+
+    Each patient draws a risk profile, copies a template with that profile
+    (any template when none matches) and jitters its demographics and
+    baseline. Output depends only on ``templates``, ``count``, ``seed`` and
+    ``config``; sampling is done ``chunk_size`` patients at a time.
+    """
+    config = config or PopulationConfig()
+    rng = np.random.default_rng(seed)
+    risks, risk_p = _weights(config.risk_weights)
+    statuses, status_p = _weights(config.status_weights)
+    by_risk = {risk: [t for t in templates if t.get("risk_profile") == risk] or templates for risk in risks}
+    pool = sorted({diagnosis for template in templates for diagnosis in template.get("diagnoses", [])})
+    metrics = sorted({metric for template in templates for metric in template.get("baseline_profile", {})})
+    for offset in range(0, count, chunk_size):
+        size = min(chunk_size, count - offset)
+        risk_draw = rng.choice(len(risks), size=size, p=risk_p)
+        status_draw = rng.choice(len(statuses), size=size, p=status_p)
+        template_draw = rng.random(size)
+        age_noise = rng.normal(0, config.age_sd, size)
+        body_noise = rng.normal(0, config.body_jitter, (size, 2))
+        mean_noise = rng.normal(0, config.mean_jitter, (size, len(metrics)))
+        std_scale = rng.lognormal(0, config.std_sigma, (size, len(metrics)))
+        keep_draw = rng.random((size, max((len(t.get("diagnoses", [])) for t in templates), default=0)))
+        extra_draw = rng.random(size)
+        extra_pick = rng.integers(max(len(pool), 1), size=size)
+        sexes = rng.choice(["female", "male"], size=size)
+        first = rng.integers(len(FIRST_NAMES), size=size)
+        last = rng.integers(len(LAST_NAMES), size=size)
+        # Plain lists index far faster than NumPy scalars in the per-patient loop.
+        risk_draw, status_draw, template_draw = risk_draw.tolist(), status_draw.tolist(), template_draw.tolist()
+        age_noise, body_noise, mean_noise, std_scale = age_noise.tolist(), body_noise.tolist(), mean_noise.tolist(), std_scale.tolist()
+        keep_draw, extra_draw, extra_pick = keep_draw.tolist(), extra_draw.tolist(), extra_pick.tolist()
+        sexes, first, last = sexes.tolist(), first.tolist(), last.tolist()
+        for row in range(size):
+            index = offset + row
+            risk = risks[risk_draw[row]]
+            candidates = by_risk[risk]
+            template = candidates[int(template_draw[row] * len(candidates))]
+            baseline = {}
+            for column, metric in enumerate(metrics):
+                params = template.get("baseline_profile", {}).get(metric)
+                if params is None:
+                    continue
+                std = params.get("std", 1.0)
+                low, high = MEAN_LIMITS.get(metric, (0.0, float("inf")))
+                mean = min(max(params["mean"] + mean_noise[row][column] * std, low), high)
+                baseline[metric] = {"mean": round(mean, 2), "std": round(std * std_scale[row][column], 3)}
+            diagnoses = [
+                diagnosis
+                for position, diagnosis in enumerate(template.get("diagnoses", []))
+                if keep_draw[row][position] < config.keep_diagnosis
+            ]
+            if pool and extra_draw[row] < config.extra_diagnosis and pool[extra_pick[row]] not in diagnoses:
+                diagnoses.append(pool[extra_pick[row]])
+            yield {
+                "id": f"{config.id_prefix}{index:07d}",
+                "name": f"{FIRST_NAMES[first[row]]} {LAST_NAMES[last[row]]}",
+                "age": min(max(round(template["age"] + age_noise[row]), config.age_range[0]), config.age_range[1]),
+                "sex": sexes[row],
+                "height_cm": round(template["height_cm"] * (1 + body_noise[row][0]), 1),
+                "weight_kg": round(template["weight_kg"] * (1 + body_noise[row][1]), 1),
+                "diagnoses": diagnoses,
+                "risk_profile": risk,
+                "assigned_clinician": f"clinician{index % config.clinicians + 1}",
+                "monitoring_status": statuses[status_draw[row]],
+                "baseline_profile": baseline,
+            }
+
+
+def write_population(patients: Iterable[Dict], path: Path) -> int:
+    """Write NDJSON, gzip-compressed when ``path`` ends in ``.gz``."""
+    written = 0
+    with (gzip.open(path, "wt", compresslevel=6) if path.suffix == ".gz" else path.open("w")) as handle:
+        for patient in patients:
+            handle.write(json.dumps(patient, separators=(",", ":")) + "\n")
+            written += 1
+    return written
+
+
+def register_patients(base_url: str, token: str, patients: Iterable[Dict], chunk_size: int = 1000) -> Dict[str, int]:
+    """Bulk-register patients through ``POST /patients/batch``; existing ids are skipped."""
+    totals = {"created": 0, "skipped": 0}
+    headers = {"Authorization": f"Bearer {token}"}
+    chunk: List[Dict] = []
+    with httpx.Client(base_url=base_url, headers=headers, timeout=60) as client:
+
+        def flush() -> None:
+            response = client.post("/api/v1/patients/batch", json={"items": chunk})
+            response.raise_for_status()
+            for key, value in response.json().items():
+                totals[key] += value
+            chunk.clear()
+
+        for patient in patients:
+            chunk.append(patient)
+            if len(chunk) >= chunk_size:
+                flush()
+        if chunk:
+            flush()
+    return totals
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="RPM synthetic population generator")
+    parser.add_argument("--seed-path", default="backend/data/seed_patients.json", help="Template patients")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--config", help="JSON file overriding PopulationConfig fields")
+    parser.add_argument("--output", help="Write patients to this .ndjson or .ndjson.gz file")
+    parser.add_argument("--register", action="store_true", help="Register patients through /patients/batch")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Patients per /patients/batch request")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    args = build_parser().parse_args(argv)
+    if not args.output and not args.register:
+        raise SystemExit("Nothing to do: pass --output and/or --register")
+    templates = load_patients(Path(args.seed_path))
+    config = PopulationConfig.from_file(args.config)
+    if args.output:
+        written = write_population(expand_population(templates, args.count, args.seed, config), Path(args.output))
+        logger.info("Wrote %d patients to %s", written, args.output)
+    if args.register:
+        token = authenticate(args.base_url, args.username, args.password)
+        if args.output:
+            patients = load_patients(Path(args.output))
+        else:
+            patients = expand_population(templates, args.count, args.seed, config)
+        logger.info("Registered patients: %s", register_patients(args.base_url, token, patients, args.chunk_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Append-only, gzip-compressed NDJSON recordings of simulator ingest requests.
+
+Each line is ``{"sent_at": <unix seconds>, "path": "/api/v1/vitals/...", "body": {...}}``
+in send order. Every run appends a new gzip member, which ``gzip`` reads back as
+one continuous stream, so several sessions can share a file.
+"""
+import gzip
+import json
+import time
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+
+class StreamRecorder:
+    """Writes each request body just before it is sent.
+
+    ``flush`` ends a compressed block so everything recorded so far survives an
+    interrupted run; the runners call it once per tick.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self._handle = gzip.open(path, "at", compresslevel=6)
+
+    def record(self, path: str, body: Dict, sent_at: Optional[float] = None) -> None:
+        line = {"sent_at": time.time() if sent_at is None else sent_at, "path": path, "body": body}
+        self._handle.write(json.dumps(line, separators=(",", ":")) + "\n")
+
+    def flush(self) -> None:
+        self._handle.flush()
+
+    def close(self) -> None:
+        self._handle.close()
+
+    def __enter__(self) -> "StreamRecorder":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def open_recorder(path: Optional[str]) -> Optional[StreamRecorder]:
+    return StreamRecorder(Path(path)) if path else None
+
+
+def read_recording(path: Path) -> Iterator[Dict]:
+    """Yield recorded requests in the order they were sent."""
+    with gzip.open(path, "rt") as handle:
+        for line in handle:
+            if line.strip():
+                yield json.loads(line)
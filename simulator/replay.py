@@ -0,0 +1,131 @@
+"""Re-send a recording made with ``--record`` at its original pace or faster.
+
+``python -m simulator.replay incident.ndjson.gz --speed 10`` sends the same
+request bodies, in the same order, with inter-arrival gaps divided by 10.
+``--speed max`` sends them back to back. Measurement timestamps are shifted
+to start now unless ``--original-timestamps`` is given.
+"""
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import httpx
+
+from simulator.async_runner import AsyncRunner
+from simulator.recording import read_recording
+
+
+logger = logging.getLogger("simulator.replay")
+
+
+def parse_speed(value: str) -> float:
+    """``max`` (no waiting) is returned as ``0``; anything else must be a positive factor."""
+    if value == "max":
+        return 0.0
+    speed = float(value)
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be positive or 'max'")
+    return speed
+
+
+def replay_schedule(
+    records: Iterable[Dict], speed: float, max_gap: Optional[float] = None
+) -> Iterator[Tuple[float, str, Dict]]:
+    """Turn recorded requests into ``(offset, path, body)`` with gaps scaled by ``1 / speed``.
+
+    ``max_gap`` caps each original gap before scaling, which collapses the idle
+    time between sessions appended to the same recording.
+    """
+    offset = 0.0
+    previous = None
+    for record in records:
+        if previous is not None and speed:
+            gap = max(0.0, record["sent_at"] - previous)
+            if max_gap is not None:
+                gap = min(gap, max_gap)
+            offset += gap / speed
+        previous = record["sent_at"]
+        yield offset, record["path"], record["body"]
+
+
+def _measurements(body: Dict) -> Iterator[Dict]:
+    for item in body.get("items", [body]):
+        yield from item["measurements"]
+
+
+def rebase_timestamps(records: Iterable[Dict], start: datetime) -> Iterator[Dict]:
+    """Shift every measurement timestamp so the first recorded one becomes ``start``.
+
+    Spacing between readings is unchanged, so a replay lands inside the live
+    analytics window and does not collide with the originally recorded readings.
+    """
+    shift: Optional[timedelta] = None
+    for record in records:
+        for measurement in _measurements(record["body"]):
+            timestamp = datetime.fromisoformat(measurement["timestamp"])
+            if shift is None:
+                shift = start - timestamp
+            measurement["timestamp"] = (timestamp + shift).isoformat()
+        yield record
+
+
+async def run_replay(args: argparse.Namespace) -> Dict[str, float]:
+    records: Iterable[Dict] = read_recording(Path(args.recording))
+    if not args.original_timestamps:
+        records = rebase_timestamps(records, datetime.utcnow())
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        response = await client.post(
+            "/api/v1/auth/login", json={"username": args.username, "password": args.password}
+        )
+        response.raise_for_status()
+        runner = AsyncRunner(
+            client,
+            token=response.json()["access_token"],
+            concurrency=args.concurrency,
+            # Lag above one second is reported as falling behind the recording.
+            interval=1.0,
+            batch=False,
+            stats_interval=args.stats_interval,
+        )
+        return await runner.replay(replay_schedule(records, args.speed, args.max_gap))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="RPM simulator replay")
+    parser.add_argument("recording", help="Gzipped NDJSON file written with --record")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--username", default="simulator")
+    parser.add_argument("--password", default="simulator123")
+    parser.add_argument(
+        "--speed", type=parse_speed, default=1.0, help="Divide recorded gaps by this factor, or 'max' to skip waiting"
+    )
+    parser.add_argument("--max-gap", type=float, help="Cap each recorded gap at this many seconds before scaling")
+    parser.add_argument(
+        "--original-timestamps",
+        action="store_true",
+        help="Send recorded measurement timestamps unchanged instead of shifting them to start now",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Maximum requests in flight; above 1, requests may reach the backend out of order",
+    )
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--stats-interval", type=float, default=10.0, help="Seconds between lag/latency log lines")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    totals = asyncio.run(run_replay(build_parser().parse_args(argv)))
+    logger.info("Replay complete: %s", totals)
+
+
+if __name__ == "__main__":
+    main()
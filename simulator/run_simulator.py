@@ -1,17 +1,26 @@
 import argparse
+import gzip
 import json
 import time
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterator, List
 
 import httpx
 
-from simulator.generator import VitalGenerator
+from simulator.generator import VectorizedVitalGenerator, VitalGenerator
+from simulator.recording import open_recorder
 from simulator.scenarios import SCENARIOS, Scenario
 
 
 def load_patients(seed_path: Path) -> List[Dict]:
+    """Load a JSON array of patients, or NDJSON (optionally gzipped) from ``simulator.population``."""
+    if seed_path.suffix == ".gz":
+        with gzip.open(seed_path, "rt") as handle:
+            return [json.loads(line) for line in handle if line.strip()]
+    if seed_path.suffix == ".ndjson":
+        with seed_path.open() as handle:
+            return [json.loads(line) for line in handle if line.strip()]
     return json.loads(seed_path.read_text())
 
 
@@ -32,10 +41,19 @@ def ingest_measurements(base_url: str, token: str, patient_id: str, measurements
     response.raise_for_status()
 
 
-def run_simulation(args: argparse.Namespace) -> None:
-    seed_path = Path(args.seed_path)
-    patients = load_patients(seed_path)
-    generator = VitalGenerator(seed=args.seed)
+def ingest_batch(base_url: str, token: str, items: List[Dict]) -> Dict:
+    headers = {"Authorization": f"Bearer {token}"}
+    response = httpx.post(
+        f"{base_url}/api/v1/vitals/ingest/batch",
+        json={"items": items},
+        headers=headers,
+        timeout=30,
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+def build_scenario(args: argparse.Namespace) -> Scenario:
     scenario = SCENARIOS[args.scenario]
     if args.event:
         overrides = {}
@@ -49,33 +67,92 @@ def run_simulation(args: argparse.Namespace) -> None:
             acute_event_start_minute=args.event_start_minute,
             acute_event_duration_minutes=args.event_duration_minutes,
         )
+    return scenario
+
+
+def build_ticks(args: argparse.Namespace, patients: List[Dict], start_time: datetime) -> Iterator[List[Dict]]:
+    """Per-minute lists of ``{"patient_id", "measurements"}`` items for the whole run."""
+    scenario = build_scenario(args)
+    if args.vectorized:
+        return _vectorized_ticks(patients, scenario, start_time, args.duration_minutes, args.seed)
+    return _ticks(patients, VitalGenerator(seed=args.seed), scenario, start_time, args.duration_minutes)
+
+
+def run_simulation(args: argparse.Namespace) -> None:
+    patients = load_patients(Path(args.seed_path))
     token = authenticate(args.base_url, args.username, args.password)
+    recorder = open_recorder(args.record)
 
-    start_time = datetime.utcnow()
-    total_minutes = args.duration_minutes
     step = args.sample_frequency_seconds
+    ticks = build_ticks(args, patients, datetime.utcnow())
+    try:
+        for items in ticks:
+            if args.batch:
+                if items:
+                    if recorder:
+                        recorder.record("/api/v1/vitals/ingest/batch", {"items": items})
+                    ingest_batch(args.base_url, token, items)
+            else:
+                for item in items:
+                    if recorder:
+                        recorder.record("/api/v1/vitals/ingest", item)
+                    ingest_measurements(args.base_url, token, item["patient_id"], item["measurements"])
+            if recorder:
+                recorder.flush()
+            time.sleep(step)
+    finally:
+        if recorder:
+            recorder.close()
+
+
+def _ticks(
+    patients: List[Dict], generator: VitalGenerator, scenario: Scenario, start_time: datetime, total_minutes: int
+) -> Iterator[List[Dict]]:
     for minute in range(0, total_minutes):
         timestamp = start_time + timedelta(minutes=minute)
-        for patient in patients:
-            baseline = patient.get("baseline_profile", {})
-            measurements = generator.generate(baseline, scenario, timestamp, minutes_elapsed=minute)
-            ingest_measurements(args.base_url, token, patient["id"], measurements)
-        time.sleep(step)
+        yield [
+            {
+                "patient_id": patient["id"],
+                "measurements": generator.generate(
+                    patient.get("baseline_profile", {}), scenario, timestamp, minutes_elapsed=minute
+                ),
+            }
+            for patient in patients
+        ]
+
+
+def _vectorized_ticks(
+    patients: List[Dict], scenario: Scenario, start_time: datetime, total_minutes: int, seed: int
+) -> Iterator[List[Dict]]:
+    generator = VectorizedVitalGenerator(seed=seed)
+    for block in generator.generate_blocks(patients, scenario, start_time, total_minutes):
+        for index in range(len(block.timestamps)):
+            yield block.items(index)
+
+
+def add_generation_arguments(parser: argparse.ArgumentParser) -> None:
+    """Cohort, scenario and seed options shared by every mode that generates readings."""
+    parser.add_argument("--seed-path", default="backend/data/seed_patients.json")
+    parser.add_argument("--scenario", choices=SCENARIOS.keys(), default="stable")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--event", help="Comma-separated metric multipliers, e.g. heart_rate=1.4,spo2=0.88")
+    parser.add_argument("--event-start-minute", type=int, default=20)
+    parser.add_argument("--event-duration-minutes", type=int, default=10)
 
 
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="RPM Simulator Runner")
     parser.add_argument("--base-url", default="http://localhost:8000")
-    parser.add_argument("--seed-path", default="backend/data/seed_patients.json")
     parser.add_argument("--username", default="simulator")
     parser.add_argument("--password", default="simulator123")
-    parser.add_argument("--scenario", choices=SCENARIOS.keys(), default="stable")
+    add_generation_arguments(parser)
     parser.add_argument("--duration-minutes", type=int, default=60)
     parser.add_argument("--sample-frequency-seconds", type=int, default=5)
-    parser.add_argument("--seed", type=int, default=42)
-    parser.add_argument("--event", help="Comma-separated metric multipliers, e.g. heart_rate=1.4,spo2=0.88")
-    parser.add_argument("--event-start-minute", type=int, default=20)
-    parser.add_argument("--event-duration-minutes", type=int, default=10)
+    parser.add_argument("--batch", action="store_true", help="Send all patients in one /vitals/ingest/batch request per tick")
+    parser.add_argument(
+        "--vectorized", action="store_true", help="Generate readings with NumPy an hour of the cohort at a time"
+    )
+    parser.add_argument("--record", help="Append every request sent to this gzipped NDJSON file for simulator.replay")
     return parser
 
 